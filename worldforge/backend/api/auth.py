@@ -9,36 +9,42 @@ from backend.core import security # Imports create_access_token, verify_password
 # Import schemas
 from backend.models import schemas # Imports UserCreate, UserResponse, Token
 
-# >>> IMPORT fake_users_db FROM ITS NEW LOCATION <<<
-from ..core.fake_db import fake_users_db # Import the temporary in-memory database list
+# >>> IMPORT fake_users_by_name FROM ITS NEW LOCATION <<<
+from ..core.fake_db import fake_users_by_name, add_user, register_lock # Import the temporary in-memory database index
 # >>> END IMPORT <<<
 
 # Create an API router for authentication
 router = APIRouter()
 
+# Token lifetime is a constant setting - build the timedelta once at import
+# instead of on every login.
+_ACCESS_TOKEN_EXPIRES = timedelta(minutes=security.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
 # --- Helper function to get a user by username from the fake DB ---
 # This replaces the logic that was previously in get_current_user
 def get_fake_user(username: str) -> dict | None:
     """Find user data in the fake database by username."""
-    # Use next() with a default of None if no user is found
-    user_data = next((user for user in fake_users_db if user["username"] == username), None)
-    return user_data # Returns the dictionary or None
+    # Single O(1) hashtable lookup instead of scanning the whole list
+    return fake_users_by_name.get(username) # Returns the dictionary or None
 
 
 # --- Helper function to authenticate user ---
 # Used by the /login endpoint
-def authenticate_user(username: str, password: str) -> dict | None:
+async def authenticate_user(username: str, password: str) -> dict | None:
     """
     Authenticate a user against the fake database.
     Returns the user dictionary if credentials are valid, otherwise None.
     """
     user = get_fake_user(username) # Use the helper to find the user
     if not user:
+        # Burn the same bcrypt cost as a real verification so an unknown
+        # username can't be distinguished from a wrong password by timing
+        await security.averify_dummy_password(password)
         return None # User not found
 
-    # Verify the provided password against the hashed password
-    # Use the verify_password function from the security module
-    if not security.verify_password(password, user["hashed_password"]):
+    # Verify the provided password against the hashed password.
+    # Use the async variant so bcrypt runs off the event loop thread.
+    if not await security.averify_password(password, user["hashed_password"]):
         return None # Password doesn't match
 
     # Return the user data dictionary if authentication is successful
@@ -52,28 +58,35 @@ async def register(user: schemas.UserCreate):
     Registers a new user in the fake database.
     (In a real app, this would save to a persistent DB)
     """
-    # Check if username already exists in the fake database
+    # Fast-fail if the username is already taken (checked again under the
+    # lock below - this just avoids hashing for the common duplicate case)
     if get_fake_user(user.username): # Use the helper to check existence
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
 
-    # Hash the password using the function from the security module
-    hashed_password = security.get_password_hash(user.password)
-
-    # Assign a simple sequential ID (temporary)
-    new_user_id = len(fake_users_db) + 1
+    # Hash the password using the async helper so bcrypt runs off the event
+    # loop. Done outside the lock so concurrent registrations of *different*
+    # usernames don't serialize behind each other's KDF work.
+    hashed_password = await security.aget_password_hash(user.password)
 
-    # Create the new user data dictionary
+    # Create the new user data dictionary (add_user assigns the ID)
     new_user_data = {
         "username": user.username,
         "hashed_password": hashed_password,
-        "id": new_user_id
     }
 
-    # Add the new user to the fake database list
-    fake_users_db.append(new_user_data)
+    # Atomic check-then-insert: without the lock, two concurrent requests for
+    # the same username could both pass the existence check above.
+    async with register_lock:
+        if get_fake_user(user.username):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already registered"
+            )
+        # Add the new user to the fake database list and username index
+        add_user(new_user_data)
 
     # Return the created user data (filtered by UserResponse schema)
     # Need to convert the dictionary to a UserResponse schema instance
@@ -89,7 +102,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     Authenticates a user and returns a JWT access token.
     """
     # Authenticate the user using the helper function
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
 
     if not user:
         # Raise 401 for invalid credentials
@@ -101,9 +114,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
     # Create an access token for the authenticated user
     # Use the username from the authenticated user dictionary
-    access_token_expires = timedelta(minutes=security.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={"sub": user["username"]}, expires_delta=_ACCESS_TOKEN_EXPIRES
     )
 
     # Return the token
@@ -114,6 +126,22 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     }
 
 
+# --- Logout Endpoint ---
+@router.post("/logout")
+async def logout(token: str = Depends(security.oauth2_scheme)):
+    """
+    Logs the user out by evicting their token from the validated-token cache.
+    (The JWT itself stays valid until it expires - this only drops the
+    server-side fast path so a logged-out token is re-validated on reuse.)
+    """
+    if token is None:
+        # auto_error=False on oauth2_scheme hands us None for a missing
+        # Authorization header; answer 401 like every other protected route.
+        raise security._CREDENTIALS_EXCEPTION
+    security.invalidate_token(token)
+    return {"message": "Logged out"}
+
+
 # --- Protected Test Endpoint (Requires authentication) ---
 @router.get("/protected")
 async def read_protected(current_user: schemas.UserInDB = Depends(security.get_current_user)):
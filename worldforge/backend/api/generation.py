@@ -1,13 +1,18 @@
 # backend/api/generation.py
 
+import logging
+
+import orjson
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any
 
 from backend.models import schemas
 from backend.core.security import get_current_user # Import the dependency
-from backend.api.settings import user_world_builders # Import the temporary storage
+from backend.core.builder_store import BuilderStore, get_builder_store # Per-user WorldBuilder storage
 from backend.core.world_builder import WorldBuilder, LLMGenerationError, MissingWorldDataError, WorldBuilderError
 
+logger = logging.getLogger(__name__)
 
 # Create an API router for generation tasks
 router = APIRouter()
@@ -15,7 +20,8 @@ router = APIRouter()
 @router.post("/seed", response_model=schemas.PhysicalWorldData)
 async def generate_world_seed_endpoint(
     request: schemas.WorldSeedGenerateRequest,
-    current_user: schemas.UserInDB = Depends(get_current_user) # Protect this endpoint
+    current_user: schemas.UserInDB = Depends(get_current_user), # Protect this endpoint
+    store: BuilderStore = Depends(get_builder_store)
 ):
     """
     Generates the initial world seed (physical world details) for the current user's world.
@@ -23,7 +29,7 @@ async def generate_world_seed_endpoint(
     Requires LLM provider to be initialized via /api/settings/init-llm first.
     """
     # Retrieve the WorldBuilder instance for the current user
-    world_builder_instance = user_world_builders.get(current_user.username)
+    world_builder_instance = await store.get(current_user.username)
 
     # Check if WorldBuilder has been initialized for this user
     if not world_builder_instance:
@@ -35,36 +41,134 @@ async def generate_world_seed_endpoint(
     core_concept = request.prompt
 
     try:
-        # Call the generate_world_seed method from your WorldBuilder instance
-        # Ensure your generate_world_seed method handles errors internally or you wrap it
-        generated_data = world_builder_instance.generate_world_seed(core_concept)
+        # Call the generate_world_seed method from your WorldBuilder instance.
+        # It fans the category prompts out concurrently and awaits them all.
+        generated_data = await world_builder_instance.generate_world_seed(core_concept)
 
         # Your generate_world_seed returns Dict[str, str], need to map it to PhysicalWorldData schema
         # It also stores data in world_builder_instance.world_data["physical_world"]
         # Let's return the data from the instance's world_data attribute after generation
         physical_world_data = world_builder_instance.world_data.get("physical_world", {})
 
+        # Write the mutated builder back: cross-process stores hand out a
+        # copy from get(), so in-place changes are lost without this.
+        await store.set(current_user.username, world_builder_instance)
+
 
-        # Return the data, FastAPI will validate it against PhysicalWorldData schema
-        return schemas.PhysicalWorldData(**physical_world_data)
+        # Build the response model without re-validating: the data came straight
+        # from the WorldBuilder, and FastAPI runs response_model validation on
+        # the returned instance anyway, so a validating constructor here would
+        # parse the same dict twice.
+        return schemas.PhysicalWorldData.model_construct(**physical_world_data)
 
 
     except Exception as e:
         # Catch any unexpected errors during generation
-        print(f"Unexpected error during World Seed generation for user {current_user.username}: {e}") # Log error
+        logger.exception("Unexpected error during World Seed generation for user=%s", current_user.username)
         # Handle specific LLM errors returned as strings if needed, otherwise return generic 500
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An internal error occurred during world seed generation: {e}"
         )
+@router.post("/seed/stream")
+async def generate_world_seed_stream_endpoint(
+    request: schemas.WorldSeedGenerateRequest,
+    current_user: schemas.UserInDB = Depends(get_current_user), # Protect this endpoint
+    store: BuilderStore = Depends(get_builder_store)
+):
+    """
+    Streaming variant of /seed: relays generation progress as server-sent
+    events so clients see text as it is produced instead of waiting for the
+    full world seed. Each event's data is a JSON object
+    {"category": ..., "chunk": ...}; the stream ends with data: [DONE].
+    Requires authentication and a previously initialized LLM provider.
+    """
+    world_builder_instance = await store.get(current_user.username)
+
+    if not world_builder_instance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="LLM provider not initialized for this user. Please initialize settings first."
+        )
+
+    core_concept = request.prompt
+
+    async def event_stream():
+        try:
+            async for category, chunk in world_builder_instance.astream_world_seed(core_concept):
+                payload = orjson.dumps({"category": category, "chunk": chunk}).decode()
+                yield f"data: {payload}\n\n"
+            # Persist the assembled seed before signalling completion (see
+            # /seed - cross-process stores need the explicit write-back).
+            await store.set(current_user.username, world_builder_instance)
+            yield "data: [DONE]\n\n"
+        except (LLMGenerationError, WorldBuilderError) as e:
+            # The response has already started, so errors are reported as an
+            # SSE error event rather than an HTTP status.
+            logger.error("World Seed streaming failed for user=%s: %s", current_user.username, e)
+            payload = orjson.dumps({"detail": str(e)}).decode()
+            yield f"event: error\ndata: {payload}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post("/interaction/stream")
+async def simulate_interaction_stream_endpoint(
+    request: schemas.InteractionSimulateRequest,
+    current_user: schemas.UserInDB = Depends(get_current_user), # Protect this endpoint
+    store: BuilderStore = Depends(get_builder_store)
+):
+    """
+    Streams an interaction simulation as server-sent events. Interaction
+    narratives are long-form text, so waiting for the full completion makes
+    time-to-first-byte equal full-generation latency; streaming shows prose
+    as it is produced. Each event's data is {"chunk": ...}; the stream ends
+    with data: [DONE]. The assembled narrative is still stored in the
+    world's interaction history when the stream completes.
+    Requires authentication and a previously initialized LLM provider.
+    """
+    world_builder_instance = await store.get(current_user.username)
+
+    if not world_builder_instance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="LLM provider not initialized for this user. Please initialize settings first."
+        )
+
+    async def event_stream():
+        try:
+            stream = world_builder_instance.astream_interaction(
+                request.entity1_name,
+                request.entity2_name,
+                request.interaction_type,
+                request.setting_context,
+            )
+            async for chunk in stream:
+                payload = orjson.dumps({"chunk": chunk}).decode()
+                yield f"data: {payload}\n\n"
+            # Persist the stored interaction before signalling completion
+            # (see /seed - cross-process stores need the explicit write-back).
+            await store.set(current_user.username, world_builder_instance)
+            yield "data: [DONE]\n\n"
+        except (MissingWorldDataError, LLMGenerationError, WorldBuilderError) as e:
+            # The response has already started, so errors are reported as an
+            # SSE error event rather than an HTTP status.
+            logger.error("Interaction streaming failed for user=%s: %s", current_user.username, e)
+            payload = orjson.dumps({"detail": str(e)}).decode()
+            yield f"event: error\ndata: {payload}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/culture", response_model=schemas.CultureData)
 async def generate_cultural_tapestry_endpoint(
     request: schemas.CultureGenerateRequest,
-    current_user: schemas.UserInDB = Depends(get_current_user) # Protect this endpoint
+    current_user: schemas.UserInDB = Depends(get_current_user), # Protect this endpoint
+    store: BuilderStore = Depends(get_builder_store)
 ):
 
     # Retrieve the WorldBuilder instance for the current user
-    world_builder_instance = user_world_builders.get(current_user.username)
+    world_builder_instance = await store.get(current_user.username)
 
     # Check if WorldBuilder has been initialized for this user
     if not world_builder_instance:
@@ -79,33 +183,36 @@ async def generate_cultural_tapestry_endpoint(
         # Call the generate_cultural_tapestry method
         # This method will raise MissingWorldDataError if physical_world is missing
         # It will also raise LLMGenerationError or WorldBuilderError on other failures
-        world_builder_instance.generate_cultural_tapestry(societal_structure_idea)
+        await world_builder_instance.generate_cultural_tapestry(societal_structure_idea)
 
         # After successful generation, retrieve the stored culture data
         culture_data = world_builder_instance.world_data.get("culture", {})
 
-        # Return the data, FastAPI will validate it against CultureData schema
+        # Write the mutated builder back (see /seed above).
+        await store.set(current_user.username, world_builder_instance)
+
+        # Build the response model without re-validating (see /seed above).
         # Note: CultureData schema has `extra = "allow"`, so it can handle extra fields
         # or fields not explicitly listed in the schema, as long as the required ones are present.
-        return schemas.CultureData(**culture_data)
+        return schemas.CultureData.model_construct(**culture_data)
 
     except MissingWorldDataError as e:
         # Specific error for missing prerequisite data
-        print(f"ERROR during Cultural Tapestry generation: {e}")
+        logger.error("Cultural Tapestry generation failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, # Bad request because prerequisite is missing
             detail=f"Generation failed: {e}"
         )
     except (LLMGenerationError, WorldBuilderError) as e:
         # Catch other specific WorldBuilder errors during generation
-        print(f"ERROR during Cultural Tapestry generation: {e}") # Log the specific error
+        logger.error("Cultural Tapestry generation failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, # LLM or internal WorldBuilder error
             detail=f"Generation failed: {e}"
         )
     except Exception as e:
         # Catch any other unexpected errors
-        print(f"Unexpected error during Cultural Tapestry generation for user {current_user.username}: {e}") # Log error
+        logger.exception("Unexpected error during Cultural Tapestry generation for user=%s", current_user.username)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred during cultural tapestry generation."
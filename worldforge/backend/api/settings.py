@@ -1,23 +1,30 @@
 # backend/api/settings.py
 
+import logging
+
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import Dict, Any
 
 from backend.models import schemas
 from backend.core.security import get_current_user # Import the dependency
-from ..core.llm_providers import LLMProvider
+from ..core.llm_providers import CachedLLMProvider, LLMProvider
 from ..core.world_builder import WorldBuilder
+from ..core.builder_store import BuilderStore, get_builder_store
 
 from .. import constants
 
-# --- In-Memory Storage for WorldBuilder Instances (TEMPORARY!) ---
-# In a real app, the WorldBuilder state (world_data) should be in a database.
-# The LLMProvider instance *could* be stored in memory per user session if it's lightweight,
-# but the WorldBuilder itself holds the world data which needs persistence.
-# For this demo, we'll store the WorldBuilder instance here, linked to the user.
-# This dictionary will reset when the backend server restarts.
-user_world_builders: Dict[str, WorldBuilder] = {}
-# --- End TEMPORARY Storage ---
+logger = logging.getLogger(__name__)
+
+# Per-user WorldBuilder storage now lives behind the BuilderStore interface
+# in backend/core/builder_store.py (in-memory by default, Redis-backed for
+# multi-worker deployments). Handlers get it injected via Depends below.
+
+# The provider list is fully static, so build the /providers response once at
+# import time instead of re-iterating PROVIDER_OPTIONS on every GET.
+_PROVIDERS_RESPONSE: Dict[str, str] = {
+    display_name: internal_key
+    for display_name, (internal_key, _) in constants.PROVIDER_OPTIONS.items()
+}
 
 
 # Create an API router for settings/initialization
@@ -26,7 +33,8 @@ router = APIRouter()
 @router.post("/init-llm", response_model=Dict[str, str]) # Return a simple success message
 async def initialize_llm_provider(
     settings: schemas.LLMSettings,
-    current_user: schemas.UserInDB = Depends(get_current_user) # Protect this endpoint
+    current_user: schemas.UserInDB = Depends(get_current_user), # Protect this endpoint
+    store: BuilderStore = Depends(get_builder_store)
 ):
     """
     Initializes the LLM Provider and WorldBuilder instance for the current user's session.
@@ -44,41 +52,46 @@ async def initialize_llm_provider(
             detail=f"Invalid LLM provider key: {provider_key}"
         )
 
-    provider_type, provider_class = provider_info
+    provider_type, provider_factory = provider_info
 
-    # Validate API key presence if not mock
-    if provider_type != "mock" and not api_key:
-         # For HuggingFace, also require model_id here if missing, though schema handles it
-        if provider_type == "huggingface" and not hf_model_id:
+    # Validate required inputs via set membership instead of per-type branches
+    if provider_type in constants.REQUIRES_API_KEY and not api_key:
+        if provider_type in constants.REQUIRES_MODEL_ID and not hf_model_id:
              raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"API Key and Hugging Face Model ID are required for {provider_key}"
             )
-        elif not api_key:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"API Key is required for {provider_key}"
-            )
-
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"API Key is required for {provider_key}"
+        )
 
-    llm_instance = None
     try:
-        # Initialize the specific provider instance
-        if provider_type == "mock":
-            llm_instance = MockProvider()
-        elif provider_type == "huggingface":
-             # Pass app_name/url for OpenRouter if needed, or remove from HF constructor
-             # For simplicity here, assuming HF constructor doesn't strictly need it unless via OpenRouter
-             llm_instance = provider_class(api_key=api_key, model_id=hf_model_id) # Pass model_id to HF
-        else:
-            llm_instance = provider_class(api_key=api_key)
+        # Every provider is constructed through its factory - single call,
+        # no per-type if/elif chain
+        llm_instance = provider_factory(api_key=api_key, hf_model_id=hf_model_id)
 
+        # Wrap in the exact-match response cache (on by default): iterative
+        # world-building re-submits identical prompts across retries and
+        # regenerations, and a hit skips the whole LLM round-trip. Callers
+        # relying on varied output can opt out via cache_responses=false.
+        if settings.cache_responses:
+            llm_instance = CachedLLMProvider(llm_instance)
 
         # Initialize the WorldBuilder instance with the LLM provider
         world_builder_instance = WorldBuilder(llm_instance)
 
-        # Store the WorldBuilder instance for this user (in-memory)
-        user_world_builders[current_user.username] = world_builder_instance
+        # Record the construction recipe so cross-process stores (Redis) can
+        # rebuild an equivalent provider instead of pickling the live one.
+        world_builder_instance.llm_settings = {
+            "provider_key": provider_key,
+            "api_key": api_key,
+            "hf_model_id": hf_model_id,
+            "cache_responses": settings.cache_responses,
+        }
+
+        # Store the WorldBuilder instance for this user
+        await store.set(current_user.username, world_builder_instance)
 
         return {"message": f"{provider_key} initialized and World Builder is ready for user {current_user.username}"}
 
@@ -90,7 +103,7 @@ async def initialize_llm_provider(
         )
     except Exception as e:
         # Catch any other unexpected errors during initialization
-        print(f"Unexpected error during LLM initialization for user {current_user.username}: {e}") # Log error
+        logger.exception("Unexpected error during LLM initialization for user=%s", current_user.username)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An internal error occurred during LLM initialization: {e}"
@@ -101,7 +114,4 @@ async def get_available_providers():
     """
     Returns a list of available LLM provider display names and keys.
     """
-    providers_list = {}
-    for display_name, (internal_key, _) in constants.PROVIDER_OPTIONS.items():
-        providers_list[display_name] = internal_key
-    return providers_list
\ No newline at end of file
+    return _PROVIDERS_RESPONSE
\ No newline at end of file
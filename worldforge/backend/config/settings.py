@@ -11,9 +11,22 @@ class Settings:
     # IMPORTANT: Change this to a complex, random string and keep it secret!
     # You can generate one with: openssl rand -hex 32
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-and-difficult-to-guess-key") # CHANGE THIS!
-    ALGORITHM: str = "HS256" # Or other algorithms like HS512
+    # HS256 (shared secret, default) or an asymmetric ES* curve (ES256...).
+    # Asymmetric signing lets other services verify tokens with just the
+    # public key - no shared secret distribution - and ECDSA verification is
+    # far cheaper than RSA. (Ed25519/EdDSA would be faster still and PyJWT
+    # supports it; wire up key loading for it if verification cost matters.)
+    ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
+    # PEM-encoded keypair, only used with the ES* algorithms
+    JWT_PRIVATE_KEY: str = os.getenv("JWT_PRIVATE_KEY", "")
+    JWT_PUBLIC_KEY: str = os.getenv("JWT_PUBLIC_KEY", "")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 # Token expiration time
 
+    # --- Password Hashing ---
+    # bcrypt work factor: each +1 doubles hashing time. 12 is a sensible
+    # default (~250ms); tune per deployment via the environment.
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
     # --- Database Settings (Placeholder for later) ---
     # DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./worldforge.db")
 
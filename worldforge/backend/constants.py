@@ -1,17 +1,56 @@
-from .core.llm_providers import (
-    LLMProvider,
-    GeminiProvider,
-    OpenAIProvider,
-    AnthropicProvider,
-    MockProvider,
-    HuggingFaceProvider,
-    DeepSeekProvider
-)
+import importlib
+
+# Provider classes are resolved lazily on first use instead of being imported
+# at module load. A worker that only serves /login or /providers never touches
+# backend.core.llm_providers (and whatever SDKs a provider drags in at
+# construction time). Resolved classes are cached so every init after the
+# first is a plain dict lookup.
+
+_PROVIDERS_MODULE = "backend.core.llm_providers"
+_provider_class_cache: dict[str, type] = {}
+
+
+def _provider_class(class_name: str) -> type:
+    """Resolve (and cache) a provider class from backend.core.llm_providers."""
+    cls = _provider_class_cache.get(class_name)
+    if cls is None:
+        module = importlib.import_module(_PROVIDERS_MODULE)
+        cls = getattr(module, class_name)
+        _provider_class_cache[class_name] = cls
+    return cls
+
+
+# Provider factories all take the same keyword arguments so init-llm can
+# dispatch with a single dict lookup + call instead of branching per
+# provider type. Arguments a provider doesn't need are simply ignored.
+
+def _make_mock(api_key, hf_model_id):
+    return _provider_class("MockProvider")()
+
+def _make_gemini(api_key, hf_model_id):
+    return _provider_class("GeminiProvider")(api_key=api_key)
+
+def _make_openai(api_key, hf_model_id):
+    return _provider_class("OpenAIProvider")(api_key=api_key)
+
+def _make_anthropic(api_key, hf_model_id):
+    return _provider_class("AnthropicProvider")(api_key=api_key)
+
+def _make_huggingface(api_key, hf_model_id):
+    return _provider_class("HuggingFaceProvider")(api_key=api_key, model_id=hf_model_id)
+
+def _make_deepseek(api_key, hf_model_id):
+    return _provider_class("DeepSeekProvider")(api_key=api_key)
+
 PROVIDER_OPTIONS = {
-    "Mock (No API)": ("mock", MockProvider),
-    "Google Gemini": ("gemini", GeminiProvider),
-    "OpenAI": ("openai", OpenAIProvider),
-    "Anthropic Claude": ("anthropic", AnthropicProvider),
-    "Hugging Face": ("huggingface", HuggingFaceProvider),
-    "Deepseek": ("Deepseek", DeepSeekProvider)
-}
\ No newline at end of file
+    "Mock (No API)": ("mock", _make_mock),
+    "Google Gemini": ("gemini", _make_gemini),
+    "OpenAI": ("openai", _make_openai),
+    "Anthropic Claude": ("anthropic", _make_anthropic),
+    "Hugging Face": ("huggingface", _make_huggingface),
+    "Deepseek": ("Deepseek", _make_deepseek)
+}
+
+# Validation lookups for init-llm: which provider types need which inputs.
+REQUIRES_API_KEY = frozenset({"gemini", "openai", "anthropic", "huggingface", "Deepseek"})
+REQUIRES_MODEL_ID = frozenset({"huggingface"})
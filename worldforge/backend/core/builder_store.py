@@ -0,0 +1,135 @@
+# backend/core/builder_store.py
+
+import pickle
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from .world_builder import WorldBuilder
+
+# The per-user WorldBuilder state used to live in a module-global dict in
+# backend/api/settings.py. That works for a single worker process but the
+# state vanishes across uvicorn workers, forcing session affinity. Putting
+# the storage behind a small interface lets deployments swap the in-memory
+# dict for a shared Redis backend without touching the handlers.
+
+
+class BuilderStore(ABC):
+    """Abstract storage for per-user WorldBuilder instances."""
+
+    @abstractmethod
+    async def get(self, username: str) -> Optional[WorldBuilder]:
+        """Return the WorldBuilder for a user, or None if not initialized."""
+        pass
+
+    @abstractmethod
+    async def set(self, username: str, world_builder: WorldBuilder) -> None:
+        """Store the WorldBuilder for a user."""
+        pass
+
+    @abstractmethod
+    async def delete(self, username: str) -> None:
+        """Drop the stored WorldBuilder for a user (no-op if absent)."""
+        pass
+
+
+class InMemoryBuilderStore(BuilderStore):
+    """Dict-backed store - same behaviour as the old module-global.
+
+    State resets when the server restarts and is not shared across workers.
+    """
+
+    def __init__(self):
+        self._builders: dict[str, WorldBuilder] = {}
+
+    async def get(self, username: str) -> Optional[WorldBuilder]:
+        return self._builders.get(username)
+
+    async def set(self, username: str, world_builder: WorldBuilder) -> None:
+        self._builders[username] = world_builder
+
+    async def delete(self, username: str) -> None:
+        self._builders.pop(username, None)
+
+
+def _rebuild_builder(llm_settings: dict) -> WorldBuilder:
+    """Reconstruct a WorldBuilder from the recipe recorded by /init-llm.
+
+    Live builders are not picklable - providers hold an asyncio.Lock (rate
+    limiter), pooled HTTP sessions and in-flight futures - so cross-process
+    stores persist (llm_settings, world_data) and rebuild the provider here.
+    """
+    # Imported lazily to keep the in-memory path free of the provider module
+    # and to avoid an import cycle with backend.constants at module load.
+    from .llm_providers import CachedLLMProvider
+    from .. import constants
+
+    provider_key = llm_settings["provider_key"]
+    provider_info = constants.PROVIDER_OPTIONS.get(provider_key)
+    if provider_info is None:
+        raise ValueError(f"Unknown LLM provider key in stored state: {provider_key}")
+    _, provider_factory = provider_info
+
+    llm_instance = provider_factory(
+        api_key=llm_settings.get("api_key"),
+        hf_model_id=llm_settings.get("hf_model_id"),
+    )
+    if llm_settings.get("cache_responses", True):
+        llm_instance = CachedLLMProvider(llm_instance)
+
+    builder = WorldBuilder(llm_instance)
+    builder.llm_settings = dict(llm_settings)
+    return builder
+
+
+class RedisBuilderStore(BuilderStore):
+    """Redis-backed store so `uvicorn --workers N` can scale horizontally.
+
+    Persists `(llm_settings, world_data)` under `wb:{username}` with a TTL
+    matching the token lifetime, and rebuilds the provider from the recorded
+    settings on every `get` - the live builder itself is not picklable (see
+    `_rebuild_builder`). Because `get` hands back a fresh copy, handlers that
+    mutate the builder must write it back with `set` for the changes to
+    survive the request.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ImportError("redis library not found. Please install it: pip install redis")
+        self._redis = redis.from_url(redis_url)
+        self._ttl = ttl_seconds
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"wb:{username}"
+
+    async def get(self, username: str) -> Optional[WorldBuilder]:
+        raw = await self._redis.get(self._key(username))
+        if raw is None:
+            return None
+        llm_settings, world_data = pickle.loads(raw)
+        builder = _rebuild_builder(llm_settings)
+        builder.world_data = world_data
+        return builder
+
+    async def set(self, username: str, world_builder: WorldBuilder) -> None:
+        if world_builder.llm_settings is None:
+            # Without the recipe the builder can't be reconstructed on get;
+            # /init-llm always records it, so this signals a programming error.
+            raise ValueError("WorldBuilder has no llm_settings recorded; cannot persist it")
+        payload = pickle.dumps((world_builder.llm_settings, world_builder.world_data))
+        await self._redis.set(self._key(username), payload, ex=self._ttl)
+
+    async def delete(self, username: str) -> None:
+        await self._redis.delete(self._key(username))
+
+
+# Default store for this demo deployment. Swap for a RedisBuilderStore when
+# running more than one worker process.
+_builder_store: BuilderStore = InMemoryBuilderStore()
+
+
+def get_builder_store() -> BuilderStore:
+    """FastAPI dependency returning the process-wide builder store."""
+    return _builder_store
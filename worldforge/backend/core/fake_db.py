@@ -1,10 +1,11 @@
+import asyncio
+import itertools
+
 from backend.models.schemas import UserInDB
-from passlib.context import CryptContext # Import if you need to hash initial passwords here
 
-# Assuming you defined pwd_context in security.py, you might need to re-create
-# a simple hashing context here if you hashed the initial user passwords here.
-# Or you can just keep the raw hashed passwords if they are defined like that.
-# Let's assume you had hashed passwords defined directly.
+# NOTE: if you ever need to hash passwords here (e.g. seeding real demo
+# users), use get_password_hash from backend.core.security so the hashing
+# parameters (bcrypt rounds, 72-byte truncation) stay in one place.
 
 # >>> CUT THIS LIST AND PASTE IT HERE FROM backend/api/auth.py <<<
 fake_users_db: list[dict] = [
@@ -12,4 +13,30 @@ fake_users_db: list[dict] = [
     {"username": "user", "hashed_password": "$2b$12$EXAMPLEHASH...", "id": 1},
     {"username": "admin", "hashed_password": "$2b$12$ANOTHERHASH...", "id": 2},
     # Add any other fake users you had
-]
\ No newline at end of file
+]
+
+# Hashtable index over the list above so username lookups are O(1) instead of
+# an O(N) scan. Lookups happen on every /login, /register and (indirectly) on
+# every protected request, so this is the hot path of the fake DB.
+fake_users_by_name: dict[str, dict] = {u["username"]: u for u in fake_users_db}
+
+# Monotonic ID counter - avoids recomputing len(fake_users_db) on every
+# register and can't hand out duplicate IDs if entries are ever removed.
+# next() on an itertools.count is C-level atomic.
+_next_user_id = itertools.count(start=len(fake_users_db) + 1)
+
+# Guards the check-then-insert critical section in register() so two
+# concurrent registrations of the same username can't both pass the
+# existence check.
+register_lock = asyncio.Lock()
+
+
+def add_user(user_data: dict) -> dict:
+    """Add a new user to the fake database, assigning it the next free ID.
+
+    Keeps the list and the username index in sync. Returns the stored dict.
+    """
+    user_data["id"] = next(_next_user_id)
+    fake_users_db.append(user_data)
+    fake_users_by_name[user_data["username"]] = user_data
+    return user_data
\ No newline at end of file
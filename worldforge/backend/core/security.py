@@ -1,144 +1,418 @@
 # backend/core/security.py
 
-from datetime import datetime, timedelta, timezone
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import timedelta
 from typing import Any, Union
 
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+import bcrypt
+# PyJWT: tighter decode path than python-jose (no per-call header dict
+# normalization), claims come back as a plain dict, and required-claim
+# checks run inside the library instead of our own payload probing.
+import jwt
+import jwt.api_jwt
+import orjson
 
 # Import necessary FastAPI components for authentication scheme and dependency
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from starlette.middleware.base import BaseHTTPMiddleware
 
 from backend.config.settings import settings # Import settings
 from backend.models import schemas # Import schemas (UserInDB, TokenData)
 
+# Module logger. These messages fire on every rejected request, so they use
+# logger.debug with lazy %-style args instead of print - no f-string
+# interpolation and no stdout write unless DEBUG logging is actually enabled.
+logger = logging.getLogger(__name__)
+
 # REMOVE THE TEMPORARY IMPORT FROM FAKE_DB
 # from .fake_db import fake_users_db # <--- REMOVE THIS IMPORT
 
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing uses the bcrypt library directly. passlib's CryptContext
+# added scheme negotiation, hash identification and deprecation checks in
+# Python on top of the same fixed-cost Blowfish loop - pure overhead here,
+# since this app only ever speaks bcrypt. bcrypt ignores input beyond 72
+# bytes, so passwords are explicitly truncated to keep that contract visible
+# (passlib did the same, silently).
+#
+# Backend choice: bcrypt>=4.0 (pinned in requirements.txt) replaced the old
+# cffi wrapper with the optimized, constant-time Rust bcrypt crate - it's the
+# fastest maintained implementation available as a wheel, so the only tuning
+# knob left is the work factor (BCRYPT_ROUNDS in settings; each +1 doubles
+# cost). A migration to Argon2id (argon2-cffi) would need a re-enrollment
+# path for the existing $2b$ hashes, so it's deliberately out of scope here.
+_BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Work factor resolved once at import - gensalt only needs the integer, and
+# reading it from settings per hash would repeat the attribute lookups on
+# every call for a value that never changes at runtime.
+_BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
+
+
+def _password_bytes(password: str) -> bytes:
+    """Encode a password for bcrypt, truncating to its 72-byte limit."""
+    return password.encode("utf-8")[:_BCRYPT_MAX_PASSWORD_BYTES]
+
+# OAuth2 scheme for token extraction from the Authorization header (Bearer token).
+# auto_error=False: a missing header hands get_current_user None instead of
+# raising inside the scheme, so the no-token case short-circuits to the shared
+# 401 before any validation machinery runs (scanners hit this path a lot).
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login", auto_error=False) # tokenUrl specifies the URL clients can use to get a token
+
+# --- In-process TTL cache for validated tokens ---
+# Every protected endpoint goes through get_current_user, which decodes the JWT
+# on every call. Tokens are reused for their whole lifetime, so cache the
+# resulting user object keyed by a short hash of the raw token and skip the
+# HMAC verification on cache hits. Each entry lives exactly as long as its
+# token's exp claim allows - the decode already validated exp, so a cache hit
+# can never outlive the token - and logout evicts via invalidate_token().
+_TOKEN_CACHE: dict[bytes, tuple[float, "schemas.UserInDB"]] = {}
+_TOKEN_CACHE_MAXSIZE = 10_000
+
+# Negative cache: token hashes that recently failed verification, mapped to a
+# monotonic expiry. A flood of bogus tokens otherwise forces a full signature
+# verification per request, so repeated junk short-circuits to the 401 path
+# without touching crypto. The TTL is short because a failure can be
+# transient from the token's point of view (e.g. a token seen just before a
+# key rotation); a hash collision only costs one redundant decode.
+_NEG_TOKEN_CACHE: dict[bytes, float] = {}
+_NEG_TOKEN_CACHE_MAXSIZE = 16_384
+_NEG_TOKEN_CACHE_TTL = 30.0
+
+# Placeholder hashed_password for user objects rebuilt from a token payload,
+# which never carries (and must never carry) the real hash.
+_SENTINEL_HASH = "[NOT_LOADED_FROM_DB]"
+
+# The 401 raised for any invalid/missing credential is fully static, so build
+# it once instead of constructing an HTTPException (plus headers dict) on
+# every rejected request. Raising the same instance repeatedly is fine -
+# FastAPI only reads its status/detail/headers when rendering the response.
+_CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+# Precomputed jwt.decode arguments, built once so the hot decode path reuses
+# the same objects every call. options["require"] makes PyJWT reject tokens
+# missing exp/sub inside the library instead of in our own payload checks.
+#
+# Sign/verify key material is resolved once here: with the ES* algorithms the
+# private PEM signs and the public PEM verifies (so only the auth service
+# needs the signing key); with HS* both sides are the shared secret. The ES
+# PEMs are parsed into cryptography key objects up front - handing PyJWT a
+# raw PEM string would re-parse it on every encode/decode.
+if settings.ALGORITHM.startswith("ES"):
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+    _JWT_SIGN_KEY = (load_pem_private_key(settings.JWT_PRIVATE_KEY.encode(), password=None)
+                     if settings.JWT_PRIVATE_KEY else "")
+    _JWT_VERIFY_KEY = (load_pem_public_key(settings.JWT_PUBLIC_KEY.encode())
+                       if settings.JWT_PUBLIC_KEY else "")
+else:
+    _JWT_SIGN_KEY = _JWT_VERIFY_KEY = settings.SECRET_KEY
+_JWT_ALGORITHMS = (settings.ALGORITHM,)
+_JWT_DECODE_OPTIONS = {"require": ["exp", "sub"], "verify_exp": True}
+
+
+class _OrjsonJWT(jwt.api_jwt.PyJWT):
+    """PyJWT with orjson as the payload JSON backend.
+
+    _encode_payload/_decode_payload are PyJWT's documented subclass hooks.
+    Every token op pays a JSON parse or serialize of the claims; orjson does
+    both several times faster than stdlib json and emits the same compact
+    separators, so encoded tokens are byte-identical.
+    """
+
+    def _encode_payload(self, payload, headers=None, json_encoder=None):
+        return orjson.dumps(payload)
+
+    def _decode_payload(self, decoded):
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.exceptions.DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.exceptions.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+_jwt_codec = _OrjsonJWT()
+
+
+def _token_cache_key(token: str) -> bytes:
+    """Hash the raw bearer token down to a small fixed-size cache key."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def invalidate_token(token: str) -> None:
+    """Drop a token from the validated-token cache (used by logout)."""
+    _TOKEN_CACHE.pop(_token_cache_key(token), None)
+
+# --- Verified-credentials LRU cache ---
+# bcrypt at cost 12 takes hundreds of ms per verify, so repeat logins with the
+# same credentials dominate login latency. Cache recent (password, hash)
+# verification results under a sha256 key and short-circuit the KDF on a hit.
+# This is safe: bcrypt verification is deterministic for a given pair, and
+# producing the cache key already requires knowing the plaintext password, so
+# the cache reveals nothing an attacker doesn't have.
+_VERIFIED_CREDS_CACHE: OrderedDict[bytes, bool] = OrderedDict()
+_VERIFIED_CREDS_MAXSIZE = 512
+
+
+def _creds_cache_store(cache_key: bytes, result: bool) -> None:
+    _VERIFIED_CREDS_CACHE[cache_key] = result
+    if len(_VERIFIED_CREDS_CACHE) > _VERIFIED_CREDS_MAXSIZE:
+        _VERIFIED_CREDS_CACHE.popitem(last=False)
 
-# OAuth2 scheme for token extraction from the Authorization header (Bearer token)
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login") # tokenUrl specifies the URL clients can use to get a token
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    cache_key = hashlib.sha256((plain_password + hashed_password).encode()).digest()
+    cached = _VERIFIED_CREDS_CACHE.get(cache_key)
+    if cached is not None:
+        _VERIFIED_CREDS_CACHE.move_to_end(cache_key)
+        return cached
+    result = _verify_sync(plain_password, hashed_password)
+    _creds_cache_store(cache_key, result)
+    return result
 
 def get_password_hash(password: str) -> str:
     """Hashes a plain password."""
-    return pwd_context.hash(password)
+    return _hash_sync(password)
+
+
+# --- Async bcrypt offload ---
+# login()/register() are async, but bcrypt takes hundreds of ms per call - run
+# it inline and it blocks the event loop thread, starving every other
+# coroutine. Offload verify/hash to a thread pool so the loop stays
+# responsive: bcrypt's C Blowfish loop releases the GIL, so threads scale
+# across cores here without the pickling/IPC cost a process pool would add.
+#
+# The pool size doubles as the concurrency bound under login bursts: at most
+# one bcrypt per core runs at a time and excess requests wait in the
+# executor's queue, so the scheduler never oversubscribes cores (each bcrypt
+# keeps its Blowfish state hot instead of being context-switched out). A
+# separate semaphore would duplicate what the bounded pool already does.
+# os.cpu_count() can return None, which would let the executor default to up
+# to 32 workers - fall back to 1 instead.
+_PWD_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt"
+)
+
+
+def _verify_sync(plain_password: str, hashed_password: str) -> bool:
+    """Raw bcrypt verification; the single checkpw call site."""
+    return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode("utf-8"))
+
+
+def _hash_sync(password: str) -> str:
+    """Raw bcrypt hashing; the single hashpw call site."""
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=_BCRYPT_ROUNDS)).decode("utf-8")
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """Async verify_password: checks the verified-credentials cache in-process,
+    then offloads the actual bcrypt work to the password pool on a miss."""
+    cache_key = hashlib.sha256((plain_password + hashed_password).encode()).digest()
+    cached = _VERIFIED_CREDS_CACHE.get(cache_key)
+    if cached is not None:
+        _VERIFIED_CREDS_CACHE.move_to_end(cache_key)
+        return cached
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_PWD_POOL, _verify_sync, plain_password, hashed_password)
+    _creds_cache_store(cache_key, result)
+    return result
+
+
+# A throwaway hash used to burn the same bcrypt cost when the username doesn't
+# exist, so "unknown user" and "wrong password" are indistinguishable by
+# timing. Repeat misses hit the credentials cache above, matching the fast
+# path repeat successes get.
+_DUMMY_HASH = get_password_hash("worldforge-timing-dummy")
+
+
+async def averify_dummy_password(password: str) -> None:
+    """Run a bcrypt verification against the dummy hash for the
+    user-not-found path in authenticate_user (timing equalization)."""
+    await averify_password(password, _DUMMY_HASH)
+
+
+async def aget_password_hash(password: str) -> str:
+    """Async get_password_hash: offloads bcrypt hashing to the password pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PWD_POOL, _hash_sync, password)
 
 def create_access_token(
     data: dict, expires_delta: timedelta | None = None
 ) -> str:
     """Creates a JWT access token."""
-    to_encode = data.copy()
+    # exp is a NumericDate (integer seconds since epoch), so compute it with
+    # time.time() directly instead of building tz-aware datetimes that
+    # jwt.encode would just convert back to a timestamp. The dict literal
+    # also copies `data` without mutating the caller's dict.
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        ttl = int(expires_delta.total_seconds())
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    to_encode = {**data, "exp": int(time.time()) + ttl}
 
-    # This line should be fixed from the previous step - passing datetime object
-    to_encode.update({"exp": expire})
-
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = _jwt_codec.encode(to_encode, _JWT_SIGN_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 # --- get_current_user dependency (MODIFIED) ---
 # Now validates the token and returns a UserInDB object derived from the token payload
 # It does NOT lookup fake_users_db itself anymore.
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> schemas.UserInDB:
+def _validate_token(token: str) -> schemas.UserInDB | None:
     """
-    FastAPI dependency to get the current authenticated user based on the JWT token.
-    Validates the token and returns a UserInDB model derived from the token payload.
+    Validate a bearer token (with the TTL cache fast path) and return the
+    UserInDB derived from its payload, or None if the token is invalid.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        # print(f"DEBUG: get_current_user received token: {token}") # Keep debug prints
-        # print(f"DEBUG: Using secret key: {settings.SECRET_KEY[:5]}...")
+    # Cheap structural check first: a compact JWT is exactly
+    # header.payload.signature. Anything else can't possibly decode, so bail
+    # before hashing it for the cache and before jwt.decode builds and raises
+    # an InvalidTokenError (exception construction is the expensive part of
+    # rejecting garbage input).
+    if token.count(".") != 2:
+        return None
+
+    # Fast path: this token was validated recently - return the cached user
+    # and skip the jwt.decode (HMAC verification) entirely.
+    cache_key = _token_cache_key(token)
+    cached = _TOKEN_CACHE.get(cache_key)
+    if cached is not None:
+        expires_at, cached_user = cached
+        if expires_at > time.monotonic():
+            return cached_user
+        # Stale entry - drop it and fall through to a full validation
+        _TOKEN_CACHE.pop(cache_key, None)
 
+    # Negative fast path: this token failed verification within the last
+    # _NEG_TOKEN_CACHE_TTL seconds - reject it again without re-running the
+    # signature check, so a flood of the same bogus tokens can't burn CPU.
+    neg_expires_at = _NEG_TOKEN_CACHE.get(cache_key)
+    if neg_expires_at is not None:
+        if neg_expires_at > time.monotonic():
+            return None
+        _NEG_TOKEN_CACHE.pop(cache_key, None)
+
+    try:
         # Decode token payload - This validates signature, expiration, etc.
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-
-        # print(f"DEBUG: Token payload decoded: {payload}")
-
-        username: str = payload.get("sub")
-        # Check if username exists in the payload
-        if username is None:
-             print("DEBUG: Token payload missing 'sub' claim (username).") # Add debug
-             raise credentials_exception # Token invalid structure
-
-        # We don't look up fake_users_db here anymore.
-        # We create a UserInDB object based on the info we got from the *valid* token.
-        # We need an 'id' for the UserInDB schema. The token payload doesn't include it.
-        # This is a limitation of the fake_db + token approach without putting ID in the token.
-        # TEMPORARY WORKAROUND: Assign a dummy ID, or accept UserInDB without ID for now.
-        # Let's adjust UserInDB to make id optional OR pass a dummy value.
-        # Let's pass a dummy ID for now for the UserInDB model return.
-        # In a real app, this would be querying the DB to get the full user object with the real ID.
-        dummy_user_id = 0 # Dummy ID for temporary UserInDB derived from token
-
-
-        token_data = schemas.TokenData(username=username)
-
-        # Create a UserInDB object from the token data
-        # Need to provide a hashed_password and id for the UserInDB schema.
-        # Hashed password isn't in the token. ID isn't in the token.
-        # This highlights why get_current_user normally queries the DB using the username from the token
-        # to get the *actual* User object with ID and hashed password.
-        # TEMPORARY WORKAROUND: Return a minimal object that satisfies the schema enough for endpoints to work.
-        # Or modify UserInDB/UserResponse to make sensitive fields optional in the dependency return.
-        # Let's return a minimal object that looks like UserInDB based on username.
-        # This might require UserInDB to allow initialization from just username.
-        # Revisiting schemas.py -> UserInDB requires username, hashed_password, id.
-        # UserResponse requires username, id.
-        # The endpoint `read_protected` expects `UserInDB`.
-        # Let's create a minimal UserInDB object based *only* on the username from the token.
-        # This works IF downstream code only uses `current_user.username`.
-        # It's not a TRUE UserInDB object as it's missing hashed_password/id.
-        # This is a consequence of the fake_db + token design limitations.
-
-        # TEMPORARY WORKAROUND: Create a UserInDB-like object with just the username from the token
-        # This will satisfy endpoints that only need the username.
-        # This is fragile if endpoints try to access id or hashed_password.
-        # Let's assume for now endpoints only need username. We'll add dummy ID and hashed_password.
-        minimal_user_object = schemas.UserInDB(
-            username=username,
-            hashed_password="[NOT_LOADED_FROM_DB]", # Dummy value
-            id=0 # Dummy ID as it's not in the token
-        )
-
-        # print(f"DEBUG: get_current_user returning minimal user object for: {minimal_user_object.username}") # Keep debug prints
-
-        # We don't do a user lookup here anymore with fake_users_db or real DB.
-        # The authentication happened during login; this step just validates the token.
-
-        return minimal_user_object # Return the minimal user object derived from the token
-
-
-    except JWTError as e:
-        # This block catches invalid tokens (bad signature, wrong algo, expired, bad format)
-        print(f"DEBUG: JWTError during decode: {e}")
-        raise credentials_exception # Re-raise the authentication error
-
-
-    except Exception as e:
-         # Catch any other unexpected errors during token processing
-         print(f"DEBUG: Unexpected error decoding token: {e}")
-         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal token processing error")
-
-    # REMOVE THE FAKE_USERS_DB LOOKUP SECTION
-    # print(f"DEBUG: Looking up user: {token_data.username} in fake_users_db") # <--- REMOVE
-    # user = next((u for u in fake_users_db if u.username == token_data.username), None) # <--- REMOVE
-    # print(f"DEBUG: User lookup result: {user}") # <--- REMOVE
-    # if user is None: # <--- REMOVE
-    #     raise credentials_exception # <--- REMOVE
-    # print(f"DEBUG: get_current_user successful for user: {user.username}") # <--- REMOVE
-    # return user # <--- REMOVE
\ No newline at end of file
+        payload = _jwt_codec.decode(token, _JWT_VERIFY_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS)
+    except jwt.InvalidTokenError as e:
+        # Invalid token (bad signature, wrong algo, expired, bad format,
+        # missing required claims). Remember the failure briefly; eviction
+        # mirrors the positive cache (expired entries first, then oldest).
+        logger.debug("InvalidTokenError during decode: %s", e)
+        if len(_NEG_TOKEN_CACHE) >= _NEG_TOKEN_CACHE_MAXSIZE:
+            now = time.monotonic()
+            for stale_key in [k for k, exp in _NEG_TOKEN_CACHE.items() if exp <= now]:
+                _NEG_TOKEN_CACHE.pop(stale_key, None)
+            while len(_NEG_TOKEN_CACHE) >= _NEG_TOKEN_CACHE_MAXSIZE:
+                _NEG_TOKEN_CACHE.pop(next(iter(_NEG_TOKEN_CACHE)))
+        _NEG_TOKEN_CACHE[cache_key] = time.monotonic() + _NEG_TOKEN_CACHE_TTL
+        return None
+
+    username: str = payload.get("sub")
+    # Check if username exists in the payload
+    if username is None:
+        logger.debug("Token payload missing 'sub' claim (username).")
+        return None # Token invalid structure
+
+    # We don't look up fake_users_db here - the token payload only carries the
+    # username, so build a minimal UserInDB with dummy id/hashed_password.
+    # This works because endpoints only use `current_user.username`; in a real
+    # app this would query the DB for the full user object.
+    # model_construct skips pydantic validation - safe here because every
+    # field is a known-good constant except username, which jwt.decode has
+    # already required to be present and which is only ever echoed back.
+    minimal_user_object = schemas.UserInDB.model_construct(
+        username=username,
+        hashed_password=_SENTINEL_HASH,
+        id=0 # Dummy ID as it's not in the token
+    )
+
+    # Cache the validated token for its remaining lifetime (exp is present -
+    # require_exp - and already verified by the decode above), so subsequent
+    # requests with the same token skip the decode entirely until the token
+    # actually expires. Evict expired entries (and, if still full, the
+    # oldest ones) before inserting so the cache stays bounded.
+    remaining = payload["exp"] - time.time()
+    if remaining > 0:
+        if len(_TOKEN_CACHE) >= _TOKEN_CACHE_MAXSIZE:
+            now = time.monotonic()
+            for stale_key in [k for k, (exp, _) in _TOKEN_CACHE.items() if exp <= now]:
+                _TOKEN_CACHE.pop(stale_key, None)
+            while len(_TOKEN_CACHE) >= _TOKEN_CACHE_MAXSIZE:
+                _TOKEN_CACHE.pop(next(iter(_TOKEN_CACHE)))
+        _TOKEN_CACHE[cache_key] = (time.monotonic() + remaining, minimal_user_object)
+
+    return minimal_user_object
+
+
+def warmup() -> None:
+    """Exercise the auth hot paths once so nothing cold hits real traffic.
+
+    bcrypt is already warmed as a side effect of computing _DUMMY_HASH at
+    import time; this covers the JWT side - the first encode/decode lazily
+    initializes the algorithm backend (and, for ES*, the cryptography
+    signing machinery), which would otherwise land on the first login.
+    Called from app startup in main.py.
+    """
+    token = create_access_token({"sub": "warmup"})
+    _validate_token(token)
+    invalidate_token(token)
+
+
+class AuthMiddleware(BaseHTTPMiddleware):
+    """
+    ASGI middleware that authenticates the bearer token once per request and
+    attaches the result to request.state.user (None when absent/invalid).
+
+    This keeps the per-route get_current_user dependency trivially cheap -
+    FastAPI's dependency solver no longer re-runs JWT work per dependant,
+    routes just read the precomputed state.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        user = None
+        authorization = request.headers.get("Authorization")
+        if authorization:
+            scheme, _, token = authorization.partition(" ")
+            if scheme.lower() == "bearer" and token:
+                user = _validate_token(token)
+        request.state.user = user
+        return await call_next(request)
+
+
+async def get_current_user(request: Request, token: str | None = Depends(oauth2_scheme)) -> schemas.UserInDB:
+    """
+    FastAPI dependency to get the current authenticated user.
+
+    The heavy lifting (token validation) happens once per request in
+    AuthMiddleware; this dependency just reads request.state. The
+    oauth2_scheme dependency is kept so OpenAPI still documents the
+    bearer auth and missing tokens get the standard 401.
+    """
+    if token is None:
+        # No Authorization header at all - reject before touching any
+        # validation machinery (auto_error=False hands us None here).
+        raise _CREDENTIALS_EXCEPTION
+    user = getattr(request.state, "user", None)
+    if user is None:
+        # Fallback for apps/tests that use this dependency without the
+        # middleware installed
+        user = _validate_token(token)
+    if user is None:
+        raise _CREDENTIALS_EXCEPTION
+    return user
\ No newline at end of file
@@ -1,11 +1,21 @@
-import json
-import time
-import copy
-from typing import Dict, List, Optional, Union, Any
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Union, Any
+
+import orjson
+from pydantic import ValidationError
+
+from backend.models.schemas import WorldData
 
 # Import LLMProvider from the other file in the same package (core)
 from .llm_providers import LLMProvider
 
+logger = logging.getLogger(__name__)
+
 # Define custom exceptions for clearer error handling
 class WorldBuilderError(Exception):
     """Base exception for WorldBuilder errors."""
@@ -24,6 +34,133 @@ class WorldFileError(WorldBuilderError):
     pass
 
 
+# Structural (template-level) response cache toggle. When two prompts were
+# rendered from the same _create_prompt template and differ only in their
+# interpolated values, the cached response for one can be adapted to the
+# other by substituting the old values for the new ones - no LLM round-trip.
+# Substitution only happens when it is unambiguous (see _structural_lookup);
+# set WORLDFORGE_STRUCTURAL_CACHE=0 to disable it entirely.
+_STRUCTURAL_CACHE_ENABLED = os.getenv("WORLDFORGE_STRUCTURAL_CACHE", "1") != "0"
+
+# Max in-flight LLM calls per generate_* batch. The categories within one
+# generate_* call are independent, so they are dispatched concurrently; this
+# bounds the fanout so a single request can't monopolize the provider's rate
+# limit (providers also throttle themselves via their own RateLimiter).
+# Tunable per deployment via WORLDFORGE_MAX_CONCURRENCY.
+_CATEGORY_CONCURRENCY = int(os.getenv("WORLDFORGE_MAX_CONCURRENCY", "5"))
+
+# Interaction history is kept newest-first in a bounded deque; beyond this
+# many entries the oldest are dropped.
+_MAX_INTERACTIONS = 500
+
+# When enabled, a generate_* batch is first attempted as ONE request asking
+# the model for a JSON object with all category keys - a single network
+# round-trip instead of 5-9. Responses that don't parse as the expected JSON
+# fall back to the per-category fanout, so this is safe to try with any
+# provider but is off by default because small models often ignore the JSON
+# instruction and the fallback then doubles the cost of a batch.
+_COMBINED_PROMPTS_ENABLED = os.getenv("WORLDFORGE_COMBINED_PROMPTS", "0") != "0"
+
+# When enabled, generate_* batches are submitted through the provider's
+# server-side Batch API where one exists (OpenAI/Anthropic batch_generate:
+# ~50% cheaper, decoupled from sync rate limits). Off by default because
+# batch jobs can take minutes to settle - suited to background world builds,
+# not interactive requests. Providers without a Batch API fall back to the
+# concurrent fanout automatically.
+_PROVIDER_BATCH_ENABLED = os.getenv("WORLDFORGE_PROVIDER_BATCH", "0") != "0"
+
+# Detail categories generated for each entity type; shared by the
+# single-entity generate_* methods and their generate_*_batch counterparts.
+_FACTION_CATEGORIES = ("description", "organization", "leadership", "values_ideology",
+                       "activities_methods", "relationships", "resources_assets", "history_origin")
+_CHARACTER_CATEGORIES = ("appearance", "personality", "backstory", "skills_abilities",
+                         "relationships", "aspirations_motivations", "possessions_equipment")
+_LOCATION_CATEGORIES = ("detailed_description", "history", "inhabitants_demographics",
+                        "points_of_interest", "economy_trade", "governance_law",
+                        "culture_customs", "secrets_rumors")
+
+# Prompt templates keyed by prompt type. Hoisted to module level so the
+# dict is built once at import instead of on every _create_prompt call.
+# Positional fields ({0}, {1}, ...) come from the caller's args;
+# {world_context_summary} is filled in by _create_prompt itself.
+_PROMPT_TEMPLATES: Dict[str, str] = {
+    # --- World seed prompts (expect 1 arg: core_concept) ---
+    "geography": "(give 2 word reply)You are a fantasy world-building expert... Based on the core concept '{0}', describe...",
+    "climate": "(give 2 word reply)You are a fantasy world-building expert... For a world based on '{0}', describe its climate patterns...",
+    "flora_fauna": "(give 2 word reply)You are a fantasy world-building expert... Invent unique flora and fauna for a world based on '{0}'...",
+    "resources": "(give 2 word reply)You are a fantasy world-building expert... Describe the key natural resources found in a world based on '{0}'...",
+    "history": "(give 2 word reply)You are a fantasy world-building expert... Create a concise history outline for a world based on '{0}'...",
+
+    # --- Cultural tapestry prompts (expect 3 args: idea, physical_ctx, core_concept) ---
+    "social_structure": "(give 2 word reply)You are a fantasy world-building expert... Detail the social structure of a '{0}' society within the world context '{2}'. Physical Context: {1}. Describe...",
+    "governance": "(give 2 word reply)You are a fantasy world-building expert... Describe the governance... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Explain...",
+    "economy": "(give 2 word reply)You are a fantasy world-building expert... Describe the economy of a '{0}' society within the world context '{2}'. Physical Context: {1}. Explain...",
+    "customs": "(give 2 word reply)You are a fantasy world-building expert... Describe the daily customs... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Include...",
+    "traditions": "(give 2 word reply)You are a fantasy world-building expert... Detail the significant traditions... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Describe...",
+    "religions": "(give 2 word reply)You are a fantasy world-building expert... Describe the primary religious beliefs... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Detail...",
+    "language": "(give 2 word reply)You are a fantasy world-building expert... Create key aspects of the language(s) for a '{0}' society within the world context '{2}'. Physical Context: {1}. Suggest...",
+    "art": "(give 2 word reply)You are a fantasy world-building expert... Describe the prominent artistic expressions of a '{0}' society within the world context '{2}'. Physical Context: {1}. Detail...",
+    "technology": "(give 2 word reply)You are a fantasy world-building expert... Describe the general technology level... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Consider...",
+
+    # --- Faction prompts (expect varying args, check calls carefully) ---
+    # 0=name, 1=type, 2=goal, 3=cultural_ctx, [4=physical_ctx], [5=existing_factions]
+    "faction_description": "(give 2 word reply)You are a fantasy world-building expert. Describe the faction '{0}', a '{1}' group whose main goal is '{2}'. ... Cultural Context: {3}. {world_context_summary}",
+    "faction_organization": "(give 2 word reply)Detail the internal organization... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
+    "faction_leadership": "(give 2 word reply)Describe the leadership... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
+    "faction_values": "(give 2 word reply)Explain the core values... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
+    "faction_activities": "(give 2 word reply)Describe the typical activities... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
+    "faction_relationships": "(give 2 word reply)Detail the relationships of the faction '{0}' (a '{1}' aiming for '{2}') with other groups. ... Consider other factions {3}. {world_context_summary}", # Arg index 3 is factions dict
+    "faction_resources": "(give 2 word reply)Describe the resources... for the faction '{0}' (a '{1}' aiming for '{2}'). ... Physical/Resource Context: {3}. {world_context_summary}", # Arg index 3 is physical_ctx
+    "faction_history": "(give 2 word reply)Outline the history... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Historical Context: {3}. {world_context_summary}", # Arg index 3 is physical_ctx
+
+    # --- Character prompts (expect varying args) ---
+    # 0=name, 1=role, 2=ethnicity, 3=context1, [4=context2], [5=context3], ...
+    "character_appearance": "(give 2 word reply)You are a fantasy world-building expert... Describe the physical appearance of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
+    "character_personality": "(give 2 word reply)You are a fantasy world-building expert... Describe the personality of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
+    "character_backstory": "(give 2 word reply)You are a fantasy world-building expert... Create a compelling backstory for '{0}', a '{2}' '{1}'. Consider their {3} and {4}. Quirk Origin/Influence: {5}. {world_context_summary}", # Expects 6 args
+    "character_skills": "(give 2 word reply)You are a fantasy world-building expert... Detail the skills... of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
+    "character_relationships": "(give 2 word reply)You are a fantasy world-building expert... Describe the key relationships of '{0}', a '{2}' '{1}'. Consider their {3} and existing characters like {4}. {world_context_summary}", # Expects 5 args
+    "character_aspirations": "(give 2 word reply)You are a fantasy world-building expert... Detail the aspirations... of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
+    "character_possessions": "(give 2 word reply)You are a fantasy world-building expert... Describe the significant possessions... of '{0}', a '{2}' '{1}'. Consider their {3}. {world_context_summary}", # Expects 4 args
+
+    # --- Location prompts (expect varying args) ---
+    # 0=name, 1=type, 2=brief_desc, 3=context
+    "location_description": "(give 2 word reply)You are a fantasy world-building expert... Provide a detailed sensory description of '{0}', a '{1}' described as: '{2}'. Physical Context: {3}. {world_context_summary}", # Expects 4 args
+    "location_history": "(give 2 word reply)Outline the history of '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
+    "location_inhabitants": "(give 2 word reply)Describe the typical inhabitants... of '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
+    "location_poi": "(give 2 word reply)Detail 3-5 specific points of interest within '{0}', a '{1}' ({2}).", # Expects 3 args
+    "location_economy": "(give 2 word reply)Describe the local economy... within '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
+    "location_governance": "(give 2 word reply)Explain the local governance... within '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
+    "location_culture": "(give 2 word reply)Describe the unique local culture... in '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
+    "location_secrets": "(give 2 word reply)Invent some secrets... associated with '{0}', a '{1}' ({2}).", # Expects 3 args
+
+    # --- Artifact prompts (expect varying args) ---
+    # 0=name, 1=type, 2=origin, [3=context]
+    "artifact_description": "(give 2 word reply)You are a fantasy world-building expert. Describe the appearance... of '{0}', a '{1}' artifact supposedly originating from '{2}'. {world_context_summary}", # Expects 3 args
+    "artifact_history": "(give 2 word reply)Detail the known history... surrounding '{0}', a '{1}' from '{2}'. Historical Context: {3}. {world_context_summary}", # Expects 4 args
+    "artifact_powers": "(give 2 word reply)Describe the powers... of '{0}', a '{1}' from '{2}'.", # Expects 3 args
+    "artifact_creation": "(give 2 word reply)Elaborate on the creation of '{0}', a '{1}' from '{2}'.", # Expects 3 args
+    "artifact_status": "(give 2 word reply)Describe the current status... of '{0}', a '{1}' from '{2}'.", # Expects 3 args
+    "artifact_significance": "(give 2 word reply)Explain the cultural... significance of '{0}', a '{1}' from '{2}'. Cultural Context: {3}. {world_context_summary}", # Expects 4 args
+
+    # --- Event prompts (expect varying args) ---
+    # 0=name, 1=type, 2=timeframe, [3=context], [4=context]
+    "event_description": "(give 2 word reply)You are a fantasy world-building historian. Provide a concise summary description of '{0}', a '{1}' event that occurred roughly '{2}'. {world_context_summary}", # Expects 3 args
+    "event_causes": "(give 2 word reply)Detail the primary causes... leading up to '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
+    "event_happenings": "(give 2 word reply)Describe the major happenings... during '{0}', a '{1}' ({2}).", # Expects 3 args
+    "event_figures": "I(give 2 word reply)dentify the key figures... involved in '{0}', a '{1}' ({2}). Context: {3}, {4}. {world_context_summary}", # Expects 5 args
+    "event_impact": "(give 2 word reply)Describe the immediate outcome... of '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
+    "event_consequences": "(give 2 word reply)Explain the long-term consequences... of '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
+}
+
+# Templates that embed the world-context summary; only these pay the cost
+# of building it (see WorldBuilder._world_context_summary).
+_CONTEXT_TEMPLATES = frozenset(
+    key for key, template in _PROMPT_TEMPLATES.items()
+    if "{world_context_summary}" in template
+)
+
+
 class WorldBuilder:
     """Main class for building worlds."""
 
@@ -33,6 +170,21 @@ class WorldBuilder:
             raise TypeError("llm_provider must be an instance of LLMProvider")
         self.llm = llm_provider
         self.world_data = {} # Stores all generated world info
+        # Construction recipe (provider key, api key, model id, caching flag)
+        # recorded by /init-llm. Cross-process stores persist this instead of
+        # the live provider - locks, HTTP sessions and in-flight futures don't
+        # survive pickling - and rebuild the provider from it on load.
+        self.llm_settings: Optional[Dict[str, Any]] = None
+        # Structural cache state: template_id -> (bindings, response) for the
+        # most recent successful generation per template, plus a side table
+        # mapping rendered prompts back to (template_id, bindings) so
+        # _generate_category can consult the cache without a signature change.
+        self._structural_cache: Dict[str, tuple] = {}
+        self._prompt_bindings: Dict[str, tuple] = {}
+        # Memoized world-context summary and shared context-string bundle;
+        # None means "rebuild on next use".
+        self._world_ctx_summary: Optional[str] = None
+        self._context_cache: Optional[Dict[str, str]] = None
 
     def save_world(self, filename: str) -> bool:
         """Save the current world data to a JSON file. Returns True on success."""
@@ -40,90 +192,414 @@ class WorldBuilder:
             filename += ".json"
         try:
             # In a real backend, you might save to a user-specific location or a database
-            # For this demo, saving to the backend server's filesystem is acceptable
-            with open(filename, "w", encoding='utf-8') as f:
-                json.dump(self.world_data, f, indent=2, ensure_ascii=False)
+            # For this demo, saving to the backend server's filesystem is acceptable.
+            # orjson serializes straight to UTF-8 bytes, several times faster
+            # than stdlib json on multi-MB world files.
+            with open(filename, "wb") as f:
+                # default= covers the interactions deque (serialized as a list).
+                f.write(orjson.dumps(self.world_data, option=orjson.OPT_INDENT_2, default=list))
             # Replace st.success with print/logging or just return status
-            print(f"INFO: World saved to `{filename}`")
+            logger.info("World saved to `%s`", filename)
             return True
         except Exception as e:
             # Replace st.error with print/logging or raise exception
-            print(f"ERROR: Error saving world to {filename}: {e}")
+            logger.error("Error saving world to %s: %s", filename, e)
             # Consider raising WorldFileError(f"Error saving world: {e}")
             return False
 
-    def load_world(self, file_content: str, filename: str = "uploaded_file") -> bool:
-        """Load world data from file content (received as string). Returns True on success."""
+    def load_world(self, file_content: Union[str, bytes], filename: str = "uploaded_file") -> bool:
+        """Load world data from file content (str, bytes or a file-like
+        object). Returns True on success."""
         try:
             # In a real backend, this would involve getting file content from request
-            self.world_data = json.loads(file_content)
+            # orjson accepts both str and bytes input
+            if hasattr(file_content, "read"):
+                file_content = file_content.read()
+            data = orjson.loads(file_content)
+            # Validate the top-level shape in one pydantic-core pass instead
+            # of deferring type errors to scattered .get() chains downstream;
+            # the already-parsed dict is kept as-is (no model round-trip copy).
+            WorldData.model_validate(data)
+            # Rehydrate the interaction history into its bounded deque form.
+            if isinstance(data.get("interactions"), list):
+                data["interactions"] = deque(data["interactions"], maxlen=_MAX_INTERACTIONS)
+            self.world_data = data
+            self._invalidate_context()
             # Replace st.success with print/logging or return status
-            print(f"INFO: World loaded from `{filename}`")
+            logger.info("World loaded from `%s`", filename)
             return True
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Replace st.error with print/logging or raise exception
-            print(f"ERROR: Invalid JSON file ({filename}). Could not load world data.")
+            logger.error("Invalid JSON file (%s). Could not load world data.", filename)
             # Consider raising WorldFileError(f"Invalid JSON file: {filename}")
             return False
+        except ValidationError as e:
+            logger.error("World file %s has an invalid structure: %s", filename, e)
+            return False
         except Exception as e:
             # Replace st.error with print/logging or raise exception
-            print(f"ERROR: Error loading world from {filename}: {e}")
+            logger.error("Error loading world from %s: %s", filename, e)
             # Consider raising WorldFileError(f"Error loading world: {e}")
             return False
 
 
-    def _generate_category(self, category_name: str, prompt: str, data_location: List[str]) -> str:
-        """Helper to generate content for a category. Returns generated text or raises exception."""
+    # --- Structural (template-level) response cache ---
+    # Exact-match caching (CachedLLMProvider) misses whenever a single
+    # interpolated value changes. These helpers reuse the last response for
+    # the same template by substituting old binding values for new ones,
+    # GenCache-style, and fall back to the LLM whenever the substitution
+    # would be ambiguous.
+
+    def _remember_bindings(self, prompt: str, prompt_type: str, args: tuple) -> None:
+        """Record which template and argument values produced a rendered prompt.
+
+        Non-string arguments (context dicts etc.) are stored as None, which
+        marks their slot as unsubstitutable.
+        """
+        if len(self._prompt_bindings) > 256:
+            self._prompt_bindings.clear()
+        self._prompt_bindings[prompt] = (
+            prompt_type,
+            tuple(arg if isinstance(arg, str) else None for arg in args),
+        )
+
+    def _structural_lookup(self, prompt: str) -> Optional[str]:
+        """Return a response adapted from the structural cache, or None.
+
+        Adaptation requires every changed binding to be a distinctive string
+        that actually occurs in the cached response; anything else (changed
+        context blobs, values too short to substitute safely, values the LLM
+        didn't echo) falls back to a real generation.
+        """
+        if not _STRUCTURAL_CACHE_ENABLED:
+            return None
+        meta = self._prompt_bindings.get(prompt)
+        if meta is None:
+            return None
+        template_id, bindings = meta
+        cached = self._structural_cache.get(template_id)
+        if cached is None:
+            return None
+        old_bindings, response = cached
+        if len(old_bindings) != len(bindings):
+            return None
+        for old, new in zip(old_bindings, bindings):
+            if old == new:
+                continue
+            if old is None or new is None or len(old) < 3 or old not in response:
+                return None
+            response = response.replace(old, new)
+        return response
+
+    def _structural_store(self, prompt: str, result: str) -> None:
+        """Cache a successful response under its template id (latest wins)."""
+        if not _STRUCTURAL_CACHE_ENABLED:
+            return
+        meta = self._prompt_bindings.get(prompt)
+        if meta is not None:
+            template_id, bindings = meta
+            self._structural_cache[template_id] = (bindings, result)
+
+    @staticmethod
+    def load_world_field(file_content: Union[str, bytes], key: str) -> Optional[Any]:
+        """Extract one top-level field from world-file content without keeping
+        the rest of the parsed tree.
+
+        For "inspect only" callers (e.g. showing just core_concept for an
+        uploaded file) this avoids holding a multi-MB dict alive. When ijson
+        is installed the file is parsed incrementally and unrelated branches
+        are never materialized at all; otherwise it falls back to a full
+        orjson parse that is dropped immediately after the lookup.
+        """
+        data = file_content.encode("utf-8") if isinstance(file_content, str) else file_content
+        try:
+            import ijson
+        except ImportError:
+            return orjson.loads(data).get(key)
+        import io
+        for value in ijson.items(io.BytesIO(data), key):
+            return value
+        return None
+
+
+    def _generate_category(self, category_name: str, prompt: str, target_dict: Dict[str, Any], leaf_key: str) -> str:
+        """Helper to generate content for a category. Stores the result under
+        target_dict[leaf_key]. Returns generated text or raises exception.
+
+        Callers resolve the container dict once per generate_* call instead
+        of this helper re-walking world_data by path for every sibling
+        category.
+        """
         result = None
         # Replace st.spinner with print or logging, or handle loading state in frontend
-        print(f"INFO: Generating {category_name.replace('_', ' ')}...")
+        logger.info("Generating %s...", category_name)
 
         try:
-            result = self.llm.generate_content(prompt)
-
-            if result and not result.startswith("Error:"):
-                # Navigate dict path to store result
-                current_level = self.world_data
-                for key in data_location[:-1]:
-                     # Create nested dicts if they don't exist
-                    current_level = current_level.setdefault(key, {})
-                current_level[data_location[-1]] = result
-                return result # Return the generated text on success
+            result = self._structural_lookup(prompt)
+            if result is None:
+                result = self.llm.generate_content(prompt)
 
-            elif result and result.startswith("Error:"):
+            # Single truthiness check and a single prefix scan per result.
+            if not result:
+                # LLM returned empty content - translate to an exception
+                # Replace st.warning
+                logger.warning("LLM returned empty content for %s.", category_name)
+                raise LLMGenerationError(f"LLM returned empty content for {category_name}.")
+            if result.startswith("Error:"):
                 # LLM returned an error string - translate to an exception
                 # Replace st.error
-                print(f"ERROR: LLM Error ({category_name}): {result}")
+                logger.error("LLM Error (%s): %s", category_name, result)
                 raise LLMGenerationError(f"LLM Error ({category_name}): {result}")
 
-            else:
-                # LLM returned empty content - translate to an exception
-                # Replace st.warning
-                print(f"WARNING: LLM returned empty content for {category_name}.")
-                raise LLMGenerationError(f"LLM returned empty content for {category_name}.")
+            self._structural_store(prompt, result)
+            target_dict[leaf_key] = result
+            self._invalidate_context()
+            return result # Return the generated text on success
 
         except Exception as e:
             # Catch any unexpected errors during generation (network, API, etc.)
             # Replace st.error
-            print(f"ERROR: Unexpected error generating {category_name}: {e}")
+            logger.error("Unexpected error generating %s: %s", category_name, e)
             # Re-raise a custom exception or the original exception
             raise WorldBuilderError(f"An unexpected error occurred during {category_name} generation: {e}") from e
 
 
+    async def _agenerate_category(self, category_name: str, prompt: str, target_dict: Dict[str, Any], leaf_key: str) -> str:
+        """Async counterpart of _generate_category; awaits the provider instead
+        of blocking the event loop. Same validation, storage and error
+        translation as the sync version."""
+        logger.info("Generating %s...", category_name)
+
+        try:
+            result = self._structural_lookup(prompt)
+            if result is None:
+                result = await self.llm.agenerate_content(prompt)
+
+            # Single truthiness check and a single prefix scan per result.
+            if not result:
+                logger.warning("LLM returned empty content for %s.", category_name)
+                raise LLMGenerationError(f"LLM returned empty content for {category_name}.")
+            if result.startswith("Error:"):
+                logger.error("LLM Error (%s): %s", category_name, result)
+                raise LLMGenerationError(f"LLM Error ({category_name}): {result}")
+
+            self._structural_store(prompt, result)
+            # Safe to write per-task: asyncio runs these on one thread,
+            # so writes never interleave.
+            target_dict[leaf_key] = result
+            self._invalidate_context()
+            return result
+
+        except Exception as e:
+            logger.error("Unexpected error generating %s: %s", category_name, e)
+            raise WorldBuilderError(f"An unexpected error occurred during {category_name} generation: {e}") from e
+
+    async def _agenerate_categories(self, jobs: List[tuple]) -> List[str]:
+        """Run (category_name, prompt, target_dict, leaf_key) jobs concurrently.
+
+        The categories in one generate_* call have no data dependencies, so
+        wall time drops from the sum of per-call latencies to roughly the
+        slowest single call. Fanout is bounded by _CATEGORY_CONCURRENCY. The
+        whole batch is allowed to settle before any failure is re-raised, so
+        successful categories are already stored in world_data even when a
+        sibling fails.
+
+        Returns the generated texts in job order.
+        """
+        if _PROVIDER_BATCH_ENABLED and len(jobs) > 1:
+            results = await self._abatch_via_provider(jobs)
+            if results is not None:
+                return results
+
+        if _COMBINED_PROMPTS_ENABLED and len(jobs) > 1:
+            results = await self._agenerate_combined(jobs)
+            if results is not None:
+                return results
+
+        semaphore = asyncio.Semaphore(_CATEGORY_CONCURRENCY)
+
+        async def run(job):
+            async with semaphore:
+                return await self._agenerate_category(*job)
+
+        results = await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return list(results)
+
+    async def astream_category(self, category_name: str, prompt: str, target_dict: Dict[str, Any], leaf_key: str):
+        """Stream one category's response chunk by chunk.
+
+        Chunks are yielded as they arrive (time-to-first-token instead of
+        full-completion latency for the caller); the concatenated text is
+        validated and stored exactly like _agenerate_category once the
+        stream ends.
+        """
+        logger.info("Streaming %s...", category_name)
+        chunks: List[str] = []
+        try:
+            cached = self._structural_lookup(prompt)
+            if cached is not None:
+                chunks.append(cached)
+                yield cached
+            else:
+                async for chunk in self.llm.astream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
+        except (LLMGenerationError, WorldBuilderError):
+            raise
+        except Exception as e:
+            logger.error("Unexpected error streaming %s: %s", category_name, e)
+            raise WorldBuilderError(f"An unexpected error occurred during {category_name} generation: {e}") from e
+
+        result = "".join(chunks)
+        # Single truthiness check and a single prefix scan per result.
+        if not result:
+            logger.warning("LLM returned empty content for %s.", category_name)
+            raise LLMGenerationError(f"LLM returned empty content for {category_name}.")
+        if result.startswith("Error:"):
+            logger.error("LLM Error (%s): %s", category_name, result)
+            raise LLMGenerationError(f"LLM Error ({category_name}): {result}")
+        self._structural_store(prompt, result)
+        target_dict[leaf_key] = result
+        self._invalidate_context()
+
+    async def astream_world_seed(self, core_concept: str):
+        """Streaming variant of generate_world_seed.
+
+        Yields (category, chunk) pairs so an endpoint can relay progress as
+        server-sent events. Categories run sequentially - chunk order within
+        a stream is meaningful, and interleaving categories would force the
+        client to demultiplex - so total wall time matches the old blocking
+        path while perceived latency drops to the first token.
+        """
+        logger.info("Streaming World Seed based on: %r", core_concept)
+        self.world_data = {"core_concept": core_concept}
+        self._invalidate_context()
+        physical_world = self.world_data.setdefault("physical_world", {})
+
+        for category in ("geography", "climate", "flora_fauna", "resources", "history"):
+            prompt = self._create_prompt(category, core_concept)
+            async for chunk in self.astream_category(category, prompt, physical_world, category):
+                yield category, chunk
+
+    async def _abatch_via_provider(self, jobs: List[tuple]) -> Optional[List[str]]:
+        """Try to run a whole job batch through the provider's Batch API.
+
+        OpenAI/Anthropic providers expose batch_generate (server-side batch:
+        half price, decoupled from sync rate limits, but minutes of settle
+        time). Returns the texts in job order with results stored, or None
+        when the provider has no Batch API or any slot failed - the caller
+        then falls back to the concurrent fanout. Note the batch path talks
+        to the provider directly, so responses bypass the response cache.
+        """
+        provider = self.llm
+        batch = getattr(provider, "batch_generate", None)
+        if batch is None and hasattr(provider, "inner"):
+            # CachedLLMProvider wraps the real provider; reach through it.
+            batch = getattr(provider.inner, "batch_generate", None)
+        if batch is None:
+            return None
+
+        prompts = [prompt for _, prompt, _, _ in jobs]
+        logger.info("Submitting %d prompts via provider Batch API...", len(prompts))
+        try:
+            # batch_generate blocks while polling; keep the event loop free.
+            results = await asyncio.to_thread(batch, prompts)
+        except Exception as e:
+            logger.warning("Provider batch failed (%s); falling back to concurrent fanout.", e)
+            return None
+
+        if len(results) != len(jobs) or any(not r or r.startswith("Error") for r in results):
+            logger.warning("Provider batch returned failed slots; falling back to concurrent fanout.")
+            return None
+
+        for (_, prompt, target_dict, leaf_key), result in zip(jobs, results):
+            self._structural_store(prompt, result)
+            target_dict[leaf_key] = result
+        self._invalidate_context()
+        return list(results)
+
+    async def _agenerate_combined(self, jobs: List[tuple]) -> Optional[List[str]]:
+        """Try to satisfy a whole batch with one multi-section LLM request.
+
+        Builds a single prompt asking for a JSON object keyed by category and
+        parses the response with orjson. Returns the texts in job order, or
+        None when the model's reply isn't the requested JSON - the caller
+        then falls back to the per-category fanout, so a provider that
+        ignores the JSON instruction costs one wasted call, never a failed
+        generation.
+        """
+        keys = [leaf_key for _, _, _, leaf_key in jobs]
+        if len(set(keys)) != len(keys):
+            # Batches that span several entities repeat category names, which
+            # can't be expressed as one JSON object - use the fanout instead.
+            return None
+        sections = "\n\n".join(
+            f'"{leaf_key}": {prompt}' for _, prompt, _, leaf_key in jobs
+        )
+        combined = (
+            "You are generating several related sections of a fantasy world at once. "
+            "Respond with ONLY a JSON object (no prose, no code fences) containing "
+            f"exactly these string keys: {', '.join(keys)}. "
+            "Each value must follow the instruction given for its key.\n\n"
+            f"{sections}"
+        )
+
+        logger.info("Generating %d categories in one combined request...", len(jobs))
+        try:
+            raw = await self.llm.agenerate_content(combined)
+        except Exception as e:
+            logger.warning("Combined generation failed (%s); falling back to per-category requests.", e)
+            return None
+
+        if not raw or raw.startswith("Error"):
+            return None
+        # Models frequently wrap JSON in markdown fences despite instructions.
+        text = raw.strip()
+        if text.startswith("```"):
+            text = text.strip("`")
+            if text.startswith("json"):
+                text = text[4:]
+        try:
+            data = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            logger.warning("Combined response was not valid JSON; falling back to per-category requests.")
+            return None
+        if not isinstance(data, dict) or any(
+            not isinstance(data.get(key), str) or not data[key] for key in keys
+        ):
+            logger.warning("Combined response missed requested keys; falling back to per-category requests.")
+            return None
+
+        for _, _, target_dict, leaf_key in jobs:
+            target_dict[leaf_key] = data[leaf_key]
+        self._invalidate_context()
+        return [data[key] for key in keys]
+
+    @staticmethod
+    def _stored_details(details: Dict[str, str], keys: List[str]) -> Dict[str, str]:
+        """Collect whichever detail categories were stored successfully - used
+        to return partial results after a sibling failed."""
+        return {key: details[key] for key in keys if key in details}
+
+
     # --- All generate_* methods (generate_world_seed, generate_cultural_tapestry, etc.) ---
     # Remove st.info/success/warning/error calls
     # These methods now *call* _generate_category which will raise exceptions on failure.
     # The endpoint handlers in api/generation.py should catch these exceptions.
     # The generate_* methods can still return the results dictionary.
 
-    def generate_world_seed(self, core_concept: str) -> Dict[str, str]:
+    async def generate_world_seed(self, core_concept: str) -> Dict[str, str]:
         """Generate foundational world descriptions based on a core concept."""
         # Replace st.info
-        print(f"INFO: Generating World Seed based on: '{core_concept}'")
+        logger.info("Generating World Seed based on: %r", core_concept)
 
         # Decide if generate_world_seed should reset world_data or add to it.
         # Original app.py reset it here. Let's keep that logic for now.
         self.world_data = {"core_concept": core_concept}
+        self._invalidate_context()
 
 
         prompts = {
@@ -134,79 +610,43 @@ class WorldBuilder:
             "history": self._create_prompt("history", core_concept)
         }
 
-        descriptions = {}
-        generated_any = False # Flag to track if any category succeeded
-
-        # The _generate_category method now raises exceptions on failure.
-        # We can catch them here to prevent one failure from stopping the whole seed generation,
-        # but the endpoint handler will still need to handle overall success/failure.
-        # For simplicity, let's call _generate_category and rely on the endpoint to catch errors.
-        # If you wanted granular error reporting per category, you'd add try/except around each call here.
-
-        # Ensure physical_world key exists before starting
-        if "physical_world" not in self.world_data:
-             self.world_data["physical_world"] = {}
-
-        # Call _generate_category for each, let exceptions propagate or catch them
-        # Example catching:
-        # try:
-        #     generated_text = self._generate_category("geography", prompts["geography"], ["physical_world", "geography"])
-        #     descriptions["geography"] = generated_text
-        #     generated_any = True
-        # except (LLMGenerationError, WorldBuilderError) as e:
-        #      print(f"WARNING: Geography generation failed: {e}")
-        #      self.world_data["physical_world"]["geography"] = f"Error: {e}" # Optional: store error message
-        #      # Do NOT set generated_any = True for this category
-        #
-        # Repeat try/except for each category... This can get verbose.
-        # A simpler approach for now: call _generate_category, it stores & raises.
-        # The endpoint catches. The endpoint returns the *current* state of physical_world_data.
-
-        # Simpler approach: Just call, let errors propagate
+        # Resolve the container once; every category writes into it directly.
+        physical_world = self.world_data.setdefault("physical_world", {})
+
+        # The five categories only depend on core_concept, so dispatch them
+        # concurrently and let the batch settle; any failure re-raises here
+        # for the endpoint to handle.
         try:
-            self._generate_category("geography", prompts["geography"], ["physical_world", "geography"])
-            self._generate_category("climate", prompts["climate"], ["physical_world", "climate"])
-            # Use alias key 'flora_fauna' for storage path
-            self._generate_category("flora_fauna", prompts["flora_fauna"], ["physical_world", "flora_fauna"])
-            self._generate_category("resources", prompts["resources"], ["physical_world", "resources"])
-            self._generate_category("history", prompts["history"], ["physical_world", "history"])
-            generated_any = True # If all calls complete without raising
+            await self._agenerate_categories([
+                (category, prompts[category], physical_world, category)
+                for category in ("geography", "climate", "flora_fauna", "resources", "history")
+            ])
 
         except (LLMGenerationError, WorldBuilderError) as e:
              # Log that generation failed, but the endpoint will handle the final error response
-             print(f"ERROR: World Seed generation failed during one category: {e}")
+             logger.error("World Seed generation failed during one category: %s", e)
              # The endpoint will catch this exception and return an error response.
-             # We don't need success/warning messages here anymore.
              raise e # Re-raise the caught exception so the endpoint knows it failed
 
-        # If we reach here, all categories attempted, some might have failed silently if using granular try/except
-        # but with the simpler re-raise, we only reach here if ALL succeeded.
-        # Remove st.success/warning
-        # if generated_any:
-        #     print("INFO: World Seed generation complete!")
-        # else:
-        #      print("WARNING: World Seed generation finished, but some content may have failed.")
-
         # Return the actual generated data structure (or parts of it)
         # The endpoint will retrieve from self.world_data and format as PhysicalWorldData
         return self.world_data.get("physical_world", {})
 
 
-    def generate_cultural_tapestry(self, societal_structure_idea: str) -> Dict[str, str]:
+    async def generate_cultural_tapestry(self, societal_structure_idea: str) -> Dict[str, str]:
         """Generate cultural descriptions based on societal structure and world descriptions."""
-        if "physical_world" not in self.world_data or not self.world_data["physical_world"]:
+        if not self.world_data.get("physical_world"):
              # Replace st.error with raising an exception
              raise MissingWorldDataError("Physical world data (World Seed) is missing. Please generate a world seed first.")
 
         # Replace st.info
-        print(f"INFO: Generating Cultural Tapestry for a '{societal_structure_idea}' society...")
+        logger.info("Generating Cultural Tapestry for a %r society...", societal_structure_idea)
 
         self.world_data["societal_structure_idea"] = societal_structure_idea
 
-        # Provide relevant physical context to the prompts
-        # Ensure robust access using .get()
-        physical_world = self.world_data.get("physical_world", {})
-        physical_context = f"Geography: {physical_world.get('geography', 'Not specified')}\nClimate: {physical_world.get('climate', 'Not specified')}\nResources: {physical_world.get('resources', 'Not specified')}"
+        # Provide relevant physical context to the prompts (shared bundle,
+        # built once per world state)
+        physical_context = self._get_contexts()["seed_physical"]
         core_concept = self.world_data.get('core_concept', 'this world')
 
         prompts = {
@@ -221,32 +661,25 @@ class WorldBuilder:
             "technology": self._create_prompt("technology", societal_structure_idea, physical_context, core_concept)
         }
 
-        # Ensure culture key exists before generating
-        if "culture" not in self.world_data:
-            self.world_data["culture"] = {}
+        # Resolve the container once; every category writes into it directly.
+        culture = self.world_data.setdefault("culture", {})
 
-        generated_descriptions = {} # Dictionary to hold generated text for return
-
-        # Call _generate_category for each, catch exceptions if you want partial success,
-        # or let them propagate to the endpoint handler.
-        # Let's call and store if successful, let exceptions propagate on failure of any step.
+        # All nine categories share the same inputs, so run them as one
+        # concurrent batch; any failure re-raises for the endpoint to handle.
+        categories = ("social_structure", "governance", "economy", "customs", "traditions",
+                      "religions", "language", "art", "technology")
         try:
-            generated_descriptions["social_structure"] = self._generate_category("social_structure", prompts["social_structure"], ["culture", "social_structure"])
-            generated_descriptions["governance"] = self._generate_category("governance", prompts["governance"], ["culture", "governance"])
-            generated_descriptions["economy"] = self._generate_category("economy", prompts["economy"], ["culture", "economy"])
-            generated_descriptions["customs"] = self._generate_category("customs", prompts["customs"], ["culture", "customs"])
-            generated_descriptions["traditions"] = self._generate_category("traditions", prompts["traditions"], ["culture", "traditions"])
-            generated_descriptions["religions"] = self._generate_category("religions", prompts["religions"], ["culture", "religions"])
-            generated_descriptions["language"] = self._generate_category("language", prompts["language"], ["culture", "language"])
-            generated_descriptions["art"] = self._generate_category("art", prompts["art"], ["culture", "art"])
-            generated_descriptions["technology"] = self._generate_category("technology", prompts["technology"], ["culture", "technology"])
+            results = await self._agenerate_categories([
+                (category, prompts[category], culture, category) for category in categories
+            ])
+            generated_descriptions = dict(zip(categories, results))
 
             # Replace st.success
-            print("INFO: Cultural Tapestry generation complete!")
+            logger.info("Cultural Tapestry generation complete!")
 
         except (LLMGenerationError, WorldBuilderError) as e:
             # Replace st.warning if using try/except per category, otherwise the endpoint catches
-            print(f"ERROR: Cultural Tapestry generation failed during one category: {e}")
+            logger.error("Cultural Tapestry generation failed during one category: %s", e)
             # Re-raise the caught exception so the endpoint knows it failed
             raise e
 
@@ -255,24 +688,15 @@ class WorldBuilder:
         return generated_descriptions
 
 
-    def generate_faction(self, faction_name: str, faction_type: str, faction_goal: str) -> Dict[str, str]:
-        """Generate a faction within the world."""
-        if "culture" not in self.world_data or not self.world_data["culture"]:
-            # Replace st.error
-            raise MissingWorldDataError("Cultural data is missing. Please generate the cultural tapestry first.")
-
-        # Replace st.info
-        print(f"INFO: Generating Faction: '{faction_name}' ({faction_type}). Goal: {faction_goal}")
+    def _faction_prompts(self, faction_name: str, faction_type: str, faction_goal: str) -> Dict[str, str]:
+        """Build the per-category prompts for one faction."""
+        # Shared context bundle, built once per world state instead of per
+        # entity.
+        ctx = self._get_contexts()
+        cultural_context = ctx["faction_cultural"]
+        physical_context = ctx["faction_physical"]
 
-        # ... rest of generate_faction using _create_prompt and _generate_category ...
-        # REMOVE ALL st. calls
-        # Handle exceptions from _generate_category or let them propagate
-        # Return descriptions dict
-
-        cultural_context = f"Social Structure: {self.world_data['culture'].get('social_structure', 'Not specified')}\nGovernance: {self.world_data['culture'].get('governance', 'Not specified')}\nEconomy: {self.world_data['culture'].get('economy', 'Not specified')}\nMain Religion/Beliefs: {self.world_data['culture'].get('religions', 'Not specified')}"
-        physical_context = f"Key Resources: {self.world_data.get('physical_world', {}).get('resources', 'Not specified')}\nHistorical Context: {self.world_data.get('physical_world', {}).get('history', 'Not specified')}"
-
-        prompts = {
+        return {
             "description": self._create_prompt("faction_description", faction_name, faction_type, faction_goal, cultural_context),
             "organization": self._create_prompt("faction_organization", faction_name, faction_type, faction_goal, cultural_context),
             "leadership": self._create_prompt("faction_leadership", faction_name, faction_type, faction_goal, cultural_context),
@@ -283,69 +707,74 @@ class WorldBuilder:
             "history_origin": self._create_prompt("faction_history", faction_name, faction_type, faction_goal, physical_context)
         }
 
-        descriptions = {}
-        faction_data_base_path = ["factions", faction_name]
 
-        if "factions" not in self.world_data:
-            self.world_data["factions"] = {}
+    async def generate_faction(self, faction_name: str, faction_type: str, faction_goal: str) -> Dict[str, str]:
+        """Generate a faction within the world."""
+        if not self.world_data.get("culture"):
+            # Replace st.error
+            raise MissingWorldDataError("Cultural data is missing. Please generate the cultural tapestry first.")
 
-        # Prepare the structure for the new faction data
-        # This mirrors the structure you had for storing faction data
-        new_faction_data = {
-            "type": faction_type,
-            "goal": faction_goal,
-            "details": {}
-        }
-        # Store this partial data immediately, details will be filled by _generate_category
-        self.world_data["factions"][faction_name] = new_faction_data
+        # Replace st.info
+        logger.info("Generating Faction: %r (%s). Goal: %s", faction_name, faction_type, faction_goal)
 
+        # ... rest of generate_faction using _create_prompt and _generate_category ...
+        # REMOVE ALL st. calls
+        # Handle exceptions from _generate_category or let them propagate
+        # Return descriptions dict
 
-        # Call _generate_category for each, let exceptions propagate or catch them
+        prompts = self._faction_prompts(faction_name, faction_type, faction_goal)
+
+        # Details are accumulated locally and the faction is committed to
+        # world_data in a single assignment only after every category
+        # succeeds - a failed batch leaves no partial entry behind.
+        details: Dict[str, str] = {}
+
+
+        # Dispatch all faction categories concurrently (they only depend on
+        # the prompts built above); any failure re-raises after the batch
+        # settles so the endpoint knows it failed.
+        categories = _FACTION_CATEGORIES
         try:
-            descriptions["description"] = self._generate_category("faction description", prompts["faction_description"], faction_data_base_path + ["details", "description"])
-            descriptions["organization"] = self._generate_category("faction organization", prompts["faction_organization"], faction_data_base_path + ["details", "organization"])
-            descriptions["leadership"] = self._generate_category("faction leadership", prompts["faction_leadership"], faction_data_base_path + ["details", "leadership"])
-            descriptions["values_ideology"] = self._generate_category("faction values_ideology", prompts["faction_values"], faction_data_base_path + ["details", "values_ideology"])
-            descriptions["activities_methods"] = self._generate_category("faction activities_methods", prompts["faction_activities"], faction_data_base_path + ["details", "activities_methods"])
-            descriptions["relationships"] = self._generate_category("faction relationships", prompts["faction_relationships"], faction_data_base_path + ["details", "relationships"])
-            descriptions["resources_assets"] = self._generate_category("faction resources_assets", prompts["faction_resources"], faction_data_base_path + ["details", "resources_assets"])
-            descriptions["history_origin"] = self._generate_category("faction history_origin", prompts["faction_history"], faction_data_base_path + ["details", "history_origin"])
+            results = await self._agenerate_categories([
+                (f"faction {category}", prompts[category], details, category)
+                for category in categories
+            ])
+            descriptions = dict(zip(categories, results))
+
+            self.world_data.setdefault("factions", {})[faction_name] = {
+                "type": faction_type,
+                "goal": faction_goal,
+                "details": details
+            }
 
             # Replace st.success
-            print(f"INFO: Faction '{faction_name}' generation complete!")
+            logger.info("Faction %r generation complete!", faction_name)
 
         except (LLMGenerationError, WorldBuilderError) as e:
             # Replace st.warning/error
-            print(f"ERROR: Faction '{faction_name}' generation failed during one category: {e}")
-            # Decide how to handle partial failure:
-            # 1. Remove the partially created faction? del self.world_data["factions"][faction_name]
-            # 2. Keep the partial data and return it?
-            # 3. Re-raise the exception? Yes, re-raise so the endpoint knows it failed.
+            logger.error("Faction %r generation failed during one category: %s", faction_name, e)
+            # Nothing was committed, so the failed faction leaves no trace;
+            # re-raise so the endpoint knows it failed.
             raise e
 
         return descriptions
 
 
-    def generate_character(self, character_name: str, character_role: str, ethnicity: str, faction_name: Optional[str] = None, character_quirk: str = "") -> Dict[str, str]:
-        """Generate a character description based on role, ethnicity, optional faction, and quirk."""
-        if "culture" not in self.world_data or not self.world_data["culture"]:
-            # Replace st.error
-            raise MissingWorldDataError("Cultural data is missing. Please generate the cultural tapestry first.")
-
-        # Replace st.info
-        print(f"INFO: Generating Character: '{character_name}' ({ethnicity} {character_role}). Quirk: {character_quirk or 'None'}")
-
-        # ... rest of generate_character using _create_prompt and _generate_category ...
-        # REMOVE ALL st. calls
-        # Handle exceptions from _generate_category or let them propagate
-        # Return descriptions dict
+    def _character_prompts(self, character_name: str, character_role: str, ethnicity: str, faction_name: Optional[str], character_quirk: str) -> tuple:
+        """Build the per-category prompts for one character.
 
-        cultural_context = f"Culture ({ethnicity}): {self.world_data['culture'].get('customs', 'General customs apply.')} Traditions: {self.world_data['culture'].get('traditions', 'General traditions apply.')} Language hints: {self.world_data['culture'].get('language', 'Common tongue assumed.')}"
-        physical_context = f"Environment: {self.world_data.get('physical_world', {}).get('geography', 'Varied.')} Climate: {self.world_data.get('physical_world', {}).get('climate', 'Varied.')}"
+        Returns (prompts, faction_name) where faction_name has been reset to
+        None when the requested faction does not exist."""
+        # Shared context bundle, built once per world state instead of per
+        # entity; only the ethnicity prefix is character-specific.
+        ctx = self._get_contexts()
+        factions = self.world_data.get("factions", {})
+        cultural_context = f"Culture ({ethnicity}): {ctx['character_cultural_body']}"
+        physical_context = ctx["character_physical"]
         faction_context = ""
         # Ensure safe access using .get() and handle None faction_name
-        if faction_name and faction_name in self.world_data.get("factions", {}):
-            faction_data = self.world_data["factions"].get(faction_name, {}) # Use .get for safety
+        if faction_name and faction_name in factions:
+            faction_data = factions.get(faction_name, {}) # Use .get for safety
             faction_context = f"Affiliated Faction '{faction_name}': Type - {faction_data.get('type')}, Goal - {faction_data.get('goal')}, Values - {faction_data.get('details',{}).get('values_ideology', 'Not specified.')}"
         else:
             faction_name = None # Ensure faction_name is None if not found or provided
@@ -361,130 +790,302 @@ class WorldBuilder:
             "aspirations_motivations": self._create_prompt("character_aspirations", character_name, character_role, ethnicity, faction_context, character_quirk), # Requires 5 args? name, role, ethnicity, fact, quirk
             "possessions_equipment": self._create_prompt("character_possessions", character_name, character_role, ethnicity, cultural_context) # Requires 4 args? name, role, ethnicity, cult
         }
+        return prompts, faction_name
 
-        descriptions = {}
-        char_data_base_path = ["characters", character_name]
 
-        if "characters" not in self.world_data:
-            self.world_data["characters"] = {}
+    async def generate_character(self, character_name: str, character_role: str, ethnicity: str, faction_name: Optional[str] = None, character_quirk: str = "") -> Dict[str, str]:
+        """Generate a character description based on role, ethnicity, optional faction, and quirk."""
+        if not self.world_data.get("culture"):
+            # Replace st.error
+            raise MissingWorldDataError("Cultural data is missing. Please generate the cultural tapestry first.")
 
-        # Prepare the structure for the new character data
-        new_character_data = {
-            "role": character_role,
-            "ethnicity": ethnicity,
-            "faction": faction_name,
-            "quirk": character_quirk,
-            "details": {}
-        }
-        # Store this partial data immediately
-        self.world_data["characters"][character_name] = new_character_data
+        # Replace st.info
+        logger.info("Generating Character: %r (%s %s). Quirk: %s", character_name, ethnicity, character_role, character_quirk or "None")
 
+        # ... rest of generate_character using _create_prompt and _generate_category ...
+        # REMOVE ALL st. calls
+        # Handle exceptions from _generate_category or let them propagate
+        # Return descriptions dict
+
+        prompts, faction_name = self._character_prompts(character_name, character_role, ethnicity, faction_name, character_quirk)
+
+        # Details are accumulated locally; the character is committed to
+        # world_data in one assignment after the batch settles, so nothing
+        # half-built is visible while generation is in flight.
+        details: Dict[str, str] = {}
 
-        # Call _generate_category for each, let exceptions propagate or catch them
+
+        # Dispatch all character categories concurrently and let the batch
+        # settle before surfacing a failure.
+        categories = _CHARACTER_CATEGORIES
         try:
-            # Ensure category names passed to _generate_category match where you want data stored
-            descriptions["appearance"] = self._generate_category("character appearance", prompts["appearance"], char_data_base_path + ["details", "appearance"])
-            descriptions["personality"] = self._generate_category("character personality", prompts["personality"], char_data_base_path + ["details", "personality"])
-            descriptions["backstory"] = self._generate_category("character backstory", prompts["backstory"], char_data_base_path + ["details", "backstory"])
-            descriptions["skills_abilities"] = self._generate_category("character skills_abilities", prompts["skills_abilities"], char_data_base_path + ["details", "skills_abilities"])
-            descriptions["relationships"] = self._generate_category("character relationships", prompts["relationships"], char_data_base_path + ["details", "relationships"])
-            descriptions["aspirations_motivations"] = self._generate_category("character aspirations_motivations", prompts["aspirations_motivations"], char_data_base_path + ["details", "aspirations_motivations"])
-            descriptions["possessions_equipment"] = self._generate_category("character possessions_equipment", prompts["possessions_equipment"], char_data_base_path + ["details", "possessions_equipment"])
+            results = await self._agenerate_categories([
+                (f"character {category}", prompts[category], details, category)
+                for category in categories
+            ])
+            descriptions = dict(zip(categories, results))
 
             # Replace st.success
-            print(f"INFO: Character '{character_name}' generation complete!")
+            logger.info("Character %r generation complete!", character_name)
 
         except (LLMGenerationError, WorldBuilderError) as e:
             # Replace st.warning/error
-            print(f"ERROR: Character '{character_name}' generation failed during one category: {e}")
-            # Decide how to handle partial failure: remove or re-raise
-            # raise e # Re-raise the exception
+            logger.error("Character %r generation failed during one category: %s", character_name, e)
+            # Keep historical behavior: swallow the failure and return
+            # whatever categories did succeed.
+            descriptions = self._stored_details(details, list(categories))
+
+        # Commit whatever settled (full or partial) in a single assignment.
+        self.world_data.setdefault("characters", {})[character_name] = {
+            "role": character_role,
+            "ethnicity": ethnicity,
+            "faction": faction_name,
+            "quirk": character_quirk,
+            "details": details
+        }
 
         return descriptions
 
 
-    def generate_location(self, location_name: str, location_type: str, location_description_brief: str) -> Dict[str, str]:
+    def _location_prompts(self, location_name: str, location_type: str, location_description_brief: str) -> Dict[str, str]:
+        """Build the per-category prompts for one location."""
+        # Shared context bundle, built once per world state instead of per
+        # entity.
+        ctx = self._get_contexts()
+        physical_context = ctx["location_physical"]
+        cultural_context = ctx["location_cultural"]
+        historical_context = ctx["historical"]
+
+        return {
+            "detailed_description": self._create_prompt("location_description", location_name, location_type, location_description_brief, physical_context),
+            "history": self._create_prompt("location_history", location_name, location_type, location_description_brief, historical_context),
+            "inhabitants_demographics": self._create_prompt("location_inhabitants", location_name, location_type, location_description_brief, cultural_context),
+            "points_of_interest": self._create_prompt("location_poi", location_name, location_type, location_description_brief),
+            "economy_trade": self._create_prompt("location_economy", location_name, location_type, location_description_brief, cultural_context),
+            "governance_law": self._create_prompt("location_governance", location_name, location_type, location_description_brief, cultural_context),
+            "culture_customs": self._create_prompt("location_culture", location_name, location_type, location_description_brief, cultural_context),
+            "secrets_rumors": self._create_prompt("location_secrets", location_name, location_type, location_description_brief)
+        }
+
+
+    async def generate_location(self, location_name: str, location_type: str, location_description_brief: str) -> Dict[str, str]:
         """Generate a specific location within the world."""
-        if "physical_world" not in self.world_data or not self.world_data["physical_world"]:
+        if not self.world_data.get("physical_world"):
             # Replace st.error
             raise MissingWorldDataError("Physical world data (World Seed) is missing. Please generate a world seed first.")
 
         # Replace st.info
-        print(f"INFO: Generating Location: '{location_name}' ({location_type}). Description: {location_description_brief}")
+        logger.info("Generating Location: %r (%s). Description: %s", location_name, location_type, location_description_brief)
 
         # ... rest of generate_location using _create_prompt and _generate_category ...
         # REMOVE ALL st. calls
         # Handle exceptions from _generate_category or let them propagate
         # Return descriptions dict
 
-        physical_world = self.world_data.get("physical_world", {})
-        cultural_world = self.world_data.get("culture", {}) # Use .get() for safety
+        prompts = self._location_prompts(location_name, location_type, location_description_brief)
 
-        physical_context = f"General Geography: {physical_world.get('geography', 'Not specified')}\nGeneral Climate: {physical_world.get('climate', 'Not specified')}"
-        cultural_context = f"Dominant Culture(s): {cultural_world.get('social_structure', 'Not specified')} Governance Style: {cultural_world.get('governance', 'Not specified')}"
-        historical_context = f"World History Overview: {physical_world.get('history', 'Not specified')}"
+        # Details are accumulated locally; the location is committed to
+        # world_data in one assignment after the batch settles.
+        details: Dict[str, str] = {}
 
+        # Dispatch all location categories concurrently and let the batch
+        # settle before surfacing a failure.
+        categories = _LOCATION_CATEGORIES
+        try:
+            results = await self._agenerate_categories([
+                (f"location {category}", prompts[category], details, category)
+                for category in categories
+            ])
+            descriptions = dict(zip(categories, results))
 
-        prompts = {
-            "detailed_description": self._create_prompt("location_description", location_name, location_type, location_description_brief, physical_context),
-            "history": self._create_prompt("location_history", location_name, location_type, location_description_brief, historical_context),
-            "inhabitants_demographics": self._create_prompt("location_inhabitants", location_name, location_type, location_description_brief, cultural_context),
-            "points_of_interest": self._create_prompt("location_poi", location_name, location_type, location_description_brief),
-            "economy_trade": self._create_prompt("location_economy", location_name, location_type, location_description_brief, cultural_context),
-            "governance_law": self._create_prompt("location_governance", location_name, location_type, location_description_brief, cultural_context),
-            "culture_customs": self._create_prompt("location_culture", location_name, location_type, location_description_brief, cultural_context),
-            "secrets_rumors": self._create_prompt("location_secrets", location_name, location_type, location_description_brief)
-        }
+            # Replace st.success
+            logger.info("Location %r generation complete!", location_name)
 
-        descriptions = {}
-        loc_data_base_path = ["locations", location_name]
+        except (LLMGenerationError, WorldBuilderError) as e:
+            # Replace st.warning/error
+            logger.error("Location %r generation failed during one category: %s", location_name, e)
+            # Keep historical behavior: swallow the failure and return
+            # whatever categories did succeed.
+            descriptions = self._stored_details(details, list(categories))
 
-        if "locations" not in self.world_data:
-            self.world_data["locations"] = {}
-        self.world_data["locations"][location_name] = {
+        # Commit whatever settled (full or partial) in a single assignment.
+        self.world_data.setdefault("locations", {})[location_name] = {
             "type": location_type,
             "brief": location_description_brief,
-            "details": {}
+            "details": details
         }
 
-        # Call _generate_category for each, let exceptions propagate or catch them
+        return descriptions
+
+
+    async def generate_factions_batch(self, specs: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Generate several factions in one bounded concurrent dispatch.
+
+        Each spec is a dict of generate_faction arguments (faction_name,
+        faction_type, faction_goal). All prompts are built up front against a
+        single shared context bundle and every category of every faction goes
+        through one _agenerate_categories fanout, so N factions cost one
+        bounded batch instead of N sequential awaits. Error handling matches
+        generate_faction: only factions whose categories all succeeded are
+        committed, and the first failure is re-raised after the whole batch
+        settles. Returns {faction_name: details} for the committed factions.
+        """
+        if not self.world_data.get("culture"):
+            raise MissingWorldDataError("Cultural data is missing. Please generate the cultural tapestry first.")
+
+        logger.info("Generating %d factions in one batch", len(specs))
+
+        jobs = []
+        entities = []
+        for spec in specs:
+            faction_name = spec["faction_name"]
+            prompts = self._faction_prompts(faction_name, spec["faction_type"], spec["faction_goal"])
+            details: Dict[str, str] = {}
+            entities.append((faction_name, {
+                "type": spec["faction_type"],
+                "goal": spec["faction_goal"],
+                "details": details
+            }, details))
+            jobs.extend(
+                (f"faction {category}", prompts[category], details, category)
+                for category in _FACTION_CATEGORIES
+            )
+
+        error: Optional[Exception] = None
         try:
-            descriptions["detailed_description"] = self._generate_category("location detailed_description", prompts["detailed_description"], loc_data_base_path + ["details", "detailed_description"])
-            descriptions["history"] = self._generate_category("location history", prompts["history"], loc_data_base_path + ["details", "history"])
-            descriptions["inhabitants_demographics"] = self._generate_category("location inhabitants_demographics", prompts["inhabitants_demographics"], loc_data_base_path + ["details", "inhabitants_demographics"])
-            descriptions["points_of_interest"] = self._generate_category("location points_of_interest", prompts["points_of_interest"], loc_data_base_path + ["details", "points_of_interest"])
-            descriptions["economy_trade"] = self._generate_category("location economy_trade", prompts["economy_trade"], loc_data_base_path + ["details", "economy_trade"])
-            descriptions["governance_law"] = self._generate_category("location governance_law", prompts["governance_law"], loc_data_base_path + ["details", "governance_law"])
-            descriptions["culture_customs"] = self._generate_category("location culture_customs", prompts["culture_customs"], loc_data_base_path + ["details", "culture_customs"])
-            descriptions["secrets_rumors"] = self._generate_category("location secrets_rumors", prompts["secrets_rumors"], loc_data_base_path + ["details", "secrets_rumors"])
+            await self._agenerate_categories(jobs)
+        except (LLMGenerationError, WorldBuilderError) as e:
+            logger.error("Faction batch generation failed during one category: %s", e)
+            error = e
+
+        # Commit only the factions that completed every category - a faction
+        # with a failed sibling category leaves no partial entry, matching
+        # generate_faction's all-or-nothing contract.
+        factions = self.world_data.setdefault("factions", {})
+        results: Dict[str, Dict[str, str]] = {}
+        for faction_name, entry, details in entities:
+            if len(details) == len(_FACTION_CATEGORIES):
+                factions[faction_name] = entry
+                results[faction_name] = dict(details)
+
+        if error is not None:
+            raise error
+        return results
+
+
+    async def generate_characters_batch(self, specs: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Generate several characters in one bounded concurrent dispatch.
+
+        Each spec is a dict of generate_character arguments (character_name,
+        character_role, ethnicity, plus optional faction_name and
+        character_quirk). Prompts for the whole cast are built against a
+        single shared context bundle and dispatched through one
+        _agenerate_categories fanout. Error handling matches
+        generate_character: failures are swallowed and each character is
+        committed with whatever categories settled. Returns
+        {character_name: details}.
+        """
+        if not self.world_data.get("culture"):
+            raise MissingWorldDataError("Cultural data is missing. Please generate the cultural tapestry first.")
 
-            # Replace st.success
-            print(f"INFO: Location '{location_name}' generation complete!")
+        logger.info("Generating %d characters in one batch", len(specs))
+
+        jobs = []
+        entities = []
+        for spec in specs:
+            character_name = spec["character_name"]
+            character_quirk = spec.get("character_quirk", "")
+            prompts, resolved_faction = self._character_prompts(
+                character_name, spec["character_role"], spec["ethnicity"],
+                spec.get("faction_name"), character_quirk)
+            details: Dict[str, str] = {}
+            entities.append((character_name, {
+                "role": spec["character_role"],
+                "ethnicity": spec["ethnicity"],
+                "faction": resolved_faction,
+                "quirk": character_quirk,
+                "details": details
+            }, details))
+            jobs.extend(
+                (f"character {category}", prompts[category], details, category)
+                for category in _CHARACTER_CATEGORIES
+            )
 
+        try:
+            await self._agenerate_categories(jobs)
         except (LLMGenerationError, WorldBuilderError) as e:
-            # Replace st.warning/error
-            print(f"ERROR: Location '{location_name}' generation failed during one category: {e}")
-            # Decide how to handle partial failure: remove or re-raise
-            # raise e # Re-raise the exception
+            # Keep generate_character's contract: swallow the failure and
+            # commit whatever categories did succeed.
+            logger.error("Character batch generation failed during one category: %s", e)
+
+        characters = self.world_data.setdefault("characters", {})
+        results: Dict[str, Dict[str, str]] = {}
+        for character_name, entry, details in entities:
+            characters[character_name] = entry
+            results[character_name] = self._stored_details(details, list(_CHARACTER_CATEGORIES))
+        return results
+
+
+    async def generate_locations_batch(self, specs: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Generate several locations in one bounded concurrent dispatch.
+
+        Each spec is a dict of generate_location arguments (location_name,
+        location_type, location_description_brief). Same shape as
+        generate_characters_batch, with generate_location's error handling:
+        failures are swallowed and each location is committed with whatever
+        categories settled. Returns {location_name: details}.
+        """
+        if not self.world_data.get("physical_world"):
+            raise MissingWorldDataError("Physical world data (World Seed) is missing. Please generate a world seed first.")
 
-        return descriptions
+        logger.info("Generating %d locations in one batch", len(specs))
+
+        jobs = []
+        entities = []
+        for spec in specs:
+            location_name = spec["location_name"]
+            prompts = self._location_prompts(location_name, spec["location_type"], spec["location_description_brief"])
+            details: Dict[str, str] = {}
+            entities.append((location_name, {
+                "type": spec["location_type"],
+                "brief": spec["location_description_brief"],
+                "details": details
+            }, details))
+            jobs.extend(
+                (f"location {category}", prompts[category], details, category)
+                for category in _LOCATION_CATEGORIES
+            )
+
+        try:
+            await self._agenerate_categories(jobs)
+        except (LLMGenerationError, WorldBuilderError) as e:
+            # Keep generate_location's contract: swallow the failure and
+            # commit whatever categories did succeed.
+            logger.error("Location batch generation failed during one category: %s", e)
+
+        locations = self.world_data.setdefault("locations", {})
+        results: Dict[str, Dict[str, str]] = {}
+        for location_name, entry, details in entities:
+            locations[location_name] = entry
+            results[location_name] = self._stored_details(details, list(_LOCATION_CATEGORIES))
+        return results
 
 
-    def generate_artifact(self, artifact_name: str, artifact_type: str, artifact_origin: str) -> Dict[str, str]:
+    async def generate_artifact(self, artifact_name: str, artifact_type: str, artifact_origin: str) -> Dict[str, str]:
         """Generate a legendary artifact or important item in the world."""
         # Replace st.info
-        print(f"INFO: Generating Artifact: '{artifact_name}' ({artifact_type}). Origin: {artifact_origin}")
+        logger.info("Generating Artifact: %r (%s). Origin: %s", artifact_name, artifact_type, artifact_origin)
 
         # ... rest of generate_artifact using _create_prompt and _generate_category ...
         # REMOVE ALL st. calls
         # Handle exceptions from _generate_category or let them propagate
         # Return descriptions dict
 
-        physical_world = self.world_data.get("physical_world", {}) # Use .get() for safety
-        cultural_world = self.world_data.get("culture", {}) # Use .get() for safety
-
-        historical_context = f"World History Overview: {physical_world.get('history', 'Not specified')}"
-        cultural_context = f"Relevant Cultures: {cultural_world.get('religions', 'Various beliefs exist.')}"
+        # Shared context bundle, built once per world state instead of per
+        # entity.
+        ctx = self._get_contexts()
+        historical_context = ctx["historical"]
+        cultural_context = ctx["artifact_cultural"]
 
 
         prompts = {
@@ -496,54 +1097,57 @@ class WorldBuilder:
             "cultural_significance": self._create_prompt("artifact_significance", artifact_name, artifact_type, artifact_origin, cultural_context)
         }
 
-        descriptions = {}
-        art_data_base_path = ["artifacts", artifact_name]
-
-        if "artifacts" not in self.world_data:
-            self.world_data["artifacts"] = {}
-        self.world_data["artifacts"][artifact_name] = {
-            "type": artifact_type,
-            "origin": artifact_origin,
-            "details": {}
-        }
+        # Details are accumulated locally; the artifact is committed to
+        # world_data in one assignment after generation settles.
+        details: Dict[str, str] = {}
 
-        # Call _generate_category for each, let exceptions propagate or catch them
+        # Dispatch all artifact categories concurrently and let the batch
+        # settle before surfacing a failure.
+        categories = ("description_appearance", "history_legend", "powers_abilities",
+                      "creation_maker", "current_status_location", "cultural_significance")
         try:
-            descriptions["description_appearance"] = self._generate_category("artifact description_appearance", prompts["description_appearance"], art_data_base_path + ["details", "description_appearance"])
-            descriptions["history_legend"] = self._generate_category("artifact history_legend", prompts["history_legend"], art_data_base_path + ["details", "history_legend"])
-            descriptions["powers_abilities"] = self._generate_category("artifact powers_abilities", prompts["powers_abilities"], art_data_base_path + ["details", "powers_abilities"])
-            descriptions["creation_maker"] = self._generate_category("artifact creation_maker", prompts["creation_maker"], art_data_base_path + ["details", "creation_maker"])
-            descriptions["current_status_location"] = self._generate_category("artifact current_status_location", prompts["current_status_location"], art_data_base_path + ["details", "current_status_location"])
-            descriptions["cultural_significance"] = self._generate_category("artifact cultural_significance", prompts["cultural_significance"], art_data_base_path + ["details", "cultural_significance"])
+            results = await self._agenerate_categories([
+                (f"artifact {category}", prompts[category], details, category)
+                for category in categories
+            ])
+            descriptions = dict(zip(categories, results))
 
             # Replace st.success
-            print(f"INFO: Artifact '{artifact_name}' generation complete!")
+            logger.info("Artifact %r generation complete!", artifact_name)
 
         except (LLMGenerationError, WorldBuilderError) as e:
             # Replace st.warning/error
-            print(f"ERROR: Artifact '{artifact_name}' generation failed during one category: {e}")
-            # Decide how to handle partial failure: remove or re-raise
-            # raise e # Re-raise the exception
+            logger.error("Artifact %r generation failed during one category: %s", artifact_name, e)
+            # Keep historical behavior: swallow the failure and return
+            # whatever categories did succeed.
+            descriptions = self._stored_details(details, list(categories))
+
+        # Commit whatever settled (full or partial) in a single assignment.
+        self.world_data.setdefault("artifacts", {})[artifact_name] = {
+            "type": artifact_type,
+            "origin": artifact_origin,
+            "details": details
+        }
 
         return descriptions
 
 
-    def generate_event(self, event_name: str, event_type: str, event_timeframe: str) -> Dict[str, str]:
+    async def generate_event(self, event_name: str, event_type: str, event_timeframe: str) -> Dict[str, str]:
         """Generate a historical or current event in the world."""
         # Replace st.info
-        print(f"INFO: Generating Event: '{event_name}' ({event_type}). Timeframe: {event_timeframe}")
+        logger.info("Generating Event: %r (%s). Timeframe: %s", event_name, event_type, event_timeframe)
 
         # ... rest of generate_event using _create_prompt and _generate_category ...
         # REMOVE ALL st. calls
         # Handle exceptions from _generate_category or let them propagate
         # Return descriptions dict
 
-        physical_world = self.world_data.get("physical_world", {}) # Use .get() for safety
         factions_world = self.world_data.get("factions", {}) # Use .get() for safety
         characters_world = self.world_data.get("characters", {}) # Use .get() for safety
 
-
-        historical_context = f"World History Overview: {physical_world.get('history', 'Not specified')}"
+        # Entity lists change per generation, so those stay inline; the
+        # historical overview comes from the shared bundle.
+        historical_context = self._get_contexts()["historical"]
         faction_context = f"Existing Factions: {list(factions_world.keys())}"
         character_context = f"Notable Character Roles: {[c.get('role') for c in characters_world.values() if isinstance(c, dict) and c.get('role')]}" # Ensure c is dict and has role
 
@@ -557,41 +1161,46 @@ class WorldBuilder:
             "long_term_consequences": self._create_prompt("event_consequences", event_name, event_type, event_timeframe, historical_context)
         }
 
-        descriptions = {}
-        event_data_base_path = ["events", event_name]
+        # Details are accumulated locally; the event is committed to
+        # world_data in one assignment after generation settles.
+        details: Dict[str, str] = {}
 
-        if "events" not in self.world_data:
-            self.world_data["events"] = {}
-        self.world_data["events"][event_name] = {
-            "type": event_type,
-            "timeframe": event_timeframe,
-            "details": {}
-        }
-
-
-        # Call _generate_category for each, let exceptions propagate or catch them
+        # Dispatch all event categories concurrently and let the batch
+        # settle before surfacing a failure.
+        categories = ("summary_description", "causes_triggers", "major_happenings",
+                      "key_figures_groups", "outcome_impact", "long_term_consequences")
         try:
-            descriptions["summary_description"] = self._generate_category("event summary_description", prompts["summary_description"], event_data_base_path + ["details", "summary_description"])
-            descriptions["causes_triggers"] = self._generate_category("event causes_triggers", prompts["causes_triggers"], event_data_base_path + ["details", "causes_triggers"])
-            descriptions["major_happenings"] = self._generate_category("event major_happenings", prompts["major_happenings"], event_data_base_path + ["details", "major_happenings"])
-            descriptions["key_figures_groups"] = self._generate_category("event key_figures_groups", prompts["key_figures_groups"], event_data_base_path + ["details", "key_figures_groups"])
-            descriptions["outcome_impact"] = self._generate_category("event outcome_impact", prompts["outcome_impact"], event_data_base_path + ["details", "outcome_impact"])
-            descriptions["long_term_consequences"] = self._generate_category("event long_term_consequences", prompts["long_term_consequences"], event_data_base_path + ["details", "long_term_consequences"])
+            results = await self._agenerate_categories([
+                (f"event {category}", prompts[category], details, category)
+                for category in categories
+            ])
+            descriptions = dict(zip(categories, results))
 
             # Replace st.success
-            print(f"INFO: Event '{event_name}' generation complete!")
+            logger.info("Event %r generation complete!", event_name)
 
         except (LLMGenerationError, WorldBuilderError) as e:
             # Replace st.warning/error
-            print(f"ERROR: Event '{event_name}' generation failed during one category: {e}")
-            # Decide how to handle partial failure: remove or re-raise
-            # raise e # Re-raise the exception
+            logger.error("Event %r generation failed during one category: %s", event_name, e)
+            # Keep historical behavior: swallow the failure and return
+            # whatever categories did succeed.
+            descriptions = self._stored_details(details, list(categories))
+
+        # Commit whatever settled (full or partial) in a single assignment.
+        self.world_data.setdefault("events", {})[event_name] = {
+            "type": event_type,
+            "timeframe": event_timeframe,
+            "details": details
+        }
 
         return descriptions
 
 
-    def simulate_interaction(self, entity1_name: str, entity2_name: str, interaction_type: str, setting_context: str) -> str:
-        """Simulate an interaction between two entities (characters, factions, etc.). Returns the simulation text."""
+    def _interaction_prompt(self, entity1_name: str, entity2_name: str, interaction_type: str, setting_context: str) -> str:
+        """Build the simulation prompt for an interaction between two entities.
+
+        Raises MissingWorldDataError when either entity has not been
+        generated."""
         entity1_data = self._find_entity(entity1_name)
         entity2_data = self._find_entity(entity2_name)
 
@@ -618,8 +1227,12 @@ class WorldBuilder:
         entity1_summary = summarize_entity(entity1_name, entity1_data)
         entity2_summary = summarize_entity(entity2_name, entity2_data)
 
+        # Hoist the nested lookups out of the f-string template.
+        core_concept = self.world_data.get('core_concept', 'N/A')
+        recent_history = self.world_data.get('physical_world', {}).get('history', 'N/A')[:200]
+
         prompt = f"""You are a master storyteller simulating interactions in a fantasy world.
-World Context: Core Concept - {self.world_data.get('core_concept', 'N/A')}. Recent History - {self.world_data.get('physical_world', {}).get('history', 'N/A')[:200]}...
+World Context: Core Concept - {core_concept}. Recent History - {recent_history}...
 
 Entities Involved:
 {entity1_summary}
@@ -638,67 +1251,110 @@ Write a detailed narrative of this interaction. Include:
 - Potential short-term consequences or future implications for both entities and their surroundings.
 Maintain consistency with the provided entity summaries and world context. Be creative and engaging.
 """
+        return prompt
+
+    def _validate_simulation(self, result: str) -> None:
+        """Translate empty/error simulation output into exceptions."""
+        # Single truthiness check and a single prefix scan per result.
+        if not result:
+            # Replace st.warning
+            logger.warning("Simulation returned empty content.")
+            # Raise an exception for empty content
+            raise LLMGenerationError("Simulation returned empty content.")
+        if result.startswith("Error:"):
+            # Replace st.error
+            logger.error("LLM Error during simulation: %s", result)
+            # Raise an exception instead of returning an error string
+            raise LLMGenerationError(f"LLM Error during simulation: {result}")
+
+    def _store_interaction(self, entity1_name: str, entity2_name: str, interaction_type: str, setting_context: str, result: str) -> None:
+        """Prepend a finished interaction to the bounded history."""
+        # Save interaction to world data (in-memory)
+        # Newest first for easier display later. A bounded deque makes
+        # the prepend O(1) (list.insert(0) shifts every element) and
+        # caps memory; older interactions age out automatically.
+        interactions = self.world_data.get("interactions")
+        if not isinstance(interactions, deque):
+            interactions = deque(interactions or (), maxlen=_MAX_INTERACTIONS)
+            self.world_data["interactions"] = interactions
+        interactions.appendleft({
+            "entities": [entity1_name, entity2_name],
+            "type": interaction_type,
+            "setting": setting_context,
+            # UTC ISO timestamp; avoids strftime's per-call localtime
+            # lookup and is unambiguous across server timezones.
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "result": result
+        })
+
+    def simulate_interaction(self, entity1_name: str, entity2_name: str, interaction_type: str, setting_context: str) -> str:
+        """Simulate an interaction between two entities (characters, factions, etc.). Returns the simulation text."""
+        prompt = self._interaction_prompt(entity1_name, entity2_name, interaction_type, setting_context)
 
-        result = ""
         # Replace st.spinner
-        print(f"INFO: Simulating '{interaction_type}' between {entity1_name} and {entity2_name}...")
+        logger.info("Simulating %r between %s and %s...", interaction_type, entity1_name, entity2_name)
 
         try:
             result = self.llm.generate_content(prompt)
-
-            if result and not result.startswith("Error:"):
-                # Save interaction to world data (in-memory)
-                if "interactions" not in self.world_data:
-                    self.world_data["interactions"] = []
-                # Insert newest first for easier display later
-                self.world_data["interactions"].insert(0, {
-                    "entities": [entity1_name, entity2_name],
-                    "type": interaction_type,
-                    "setting": setting_context,
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "result": result
-                })
-                # Replace st.success
-                print("INFO: Interaction simulation complete!")
-                return result # Return the generated text
-
-            elif result: # Handle LLM error string
-                # Replace st.error
-                print(f"ERROR: LLM Error during simulation: {result}")
-                # Raise an exception instead of returning an error string
-                raise LLMGenerationError(f"LLM Error during simulation: {result}")
-
-            else:
-                # Replace st.warning
-                print("WARNING: Simulation returned empty content.")
-                # Raise an exception for empty content
-                raise LLMGenerationError("Simulation returned empty content.")
-
+            self._validate_simulation(result)
+            self._store_interaction(entity1_name, entity2_name, interaction_type, setting_context, result)
+            # Replace st.success
+            logger.info("Interaction simulation complete!")
+            return result # Return the generated text
 
         except (LLMGenerationError, WorldBuilderError) as e:
              # Replace st.error
-             print(f"ERROR: Unexpected error simulating interaction: {e}")
+             logger.error("Unexpected error simulating interaction: %s", e)
              # Re-raise the caught exception
              raise e
 
+    async def astream_interaction(self, entity1_name: str, entity2_name: str, interaction_type: str, setting_context: str):
+        """Streaming variant of simulate_interaction.
+
+        Yields narrative chunks as the provider produces them - first text in
+        one round-trip instead of full-completion latency - then validates
+        and stores the assembled result exactly like the sync version.
+        """
+        prompt = self._interaction_prompt(entity1_name, entity2_name, interaction_type, setting_context)
+
+        logger.info("Streaming %r between %s and %s...", interaction_type, entity1_name, entity2_name)
+        chunks: List[str] = []
+        try:
+            async for chunk in self.llm.astream(prompt):
+                chunks.append(chunk)
+                yield chunk
+        except (LLMGenerationError, WorldBuilderError):
+            raise
+        except Exception as e:
+            logger.error("Unexpected error streaming simulation: %s", e)
+            raise WorldBuilderError(f"An unexpected error occurred during interaction simulation: {e}") from e
+
+        result = "".join(chunks)
+        self._validate_simulation(result)
+        self._store_interaction(entity1_name, entity2_name, interaction_type, setting_context, result)
+        logger.info("Interaction simulation complete!")
+
 
     # --- _find_entity, get_all_entity_names, _create_prompt ---
     # Keep these helper methods, but remove any st. calls if they had any (they didn't in the provided code)
-    def _find_entity(self, entity_name: str) -> Optional[Dict]:
-        """Find an entity (character, faction, location) in the world data by name."""
+    def _find_entity(self, entity_name: str, readonly: bool = True) -> Optional[Mapping]:
+        """Find an entity (character, faction, location) in the world data by name.
+
+        Read-only callers (the default) get a zero-copy immutable view of
+        the live subtree; cloning a large entity just to read a few fields
+        was the bulk of simulate_interaction's Python-side cost. Pass
+        readonly=False to get an independent copy that is safe to mutate."""
         # Use .get with default empty dict to simplify checks
         # This method does not use st. calls, so it's fine as is.
-        character_data = self.world_data.get("characters", {}).get(entity_name)
-        if character_data:
-            return copy.deepcopy(character_data)
-
-        faction_data = self.world_data.get("factions", {}).get(entity_name)
-        if faction_data:
-            return copy.deepcopy(faction_data)
-
-        location_data = self.world_data.get("locations", {}).get(entity_name)
-        if location_data:
-             return copy.deepcopy(location_data)
+        for section in ("characters", "factions", "locations"):
+            data = self.world_data.get(section, {}).get(entity_name)
+            if data:
+                if readonly:
+                    return MappingProxyType(data)
+                # Entity subtrees are pure JSON data, so an orjson roundtrip
+                # clones them much faster than copy.deepcopy's per-object
+                # dispatch.
+                return orjson.loads(orjson.dumps(data))
 
         return None # Return None if not found
 
@@ -711,117 +1367,103 @@ Maintain consistency with the provided entity summaries and world context. Be cr
         return sorted(list(set(names))) # Sort and remove duplicates
 
 
-    def _create_prompt(self, prompt_type: str, *args) -> str:
-        """Create a detailed prompt based on the type and arguments, incorporating world context."""
-        # This method does not use st. calls (only print for warnings), so it's fine as is.
-        # Ensure print statements are acceptable backend logging or replace with 'logging' module.
-        # For now, print is okay for development.
+    def _invalidate_context(self) -> None:
+        """Mark every derived context string stale after world_data changes."""
+        self._world_ctx_summary = None
+        self._context_cache = None
+
+    def _get_contexts(self) -> Dict[str, str]:
+        """Return the shared per-world context strings used by entity prompts.
+
+        Each generate_faction/character/location/artifact call used to
+        rebuild these from world_data; they only change when the seed or
+        culture changes, so they are built once per world state and shared
+        by every entity generated from it (invalidated together with the
+        world-context summary).
+        """
+        if self._context_cache is not None:
+            return self._context_cache
+
+        physical_world = self.world_data.get("physical_world", {})
+        culture = self.world_data.get("culture", {})
+        self._context_cache = {
+            "seed_physical": f"Geography: {physical_world.get('geography', 'Not specified')}\nClimate: {physical_world.get('climate', 'Not specified')}\nResources: {physical_world.get('resources', 'Not specified')}",
+            "faction_cultural": f"Social Structure: {culture.get('social_structure', 'Not specified')}\nGovernance: {culture.get('governance', 'Not specified')}\nEconomy: {culture.get('economy', 'Not specified')}\nMain Religion/Beliefs: {culture.get('religions', 'Not specified')}",
+            "faction_physical": f"Key Resources: {physical_world.get('resources', 'Not specified')}\nHistorical Context: {physical_world.get('history', 'Not specified')}",
+            # Prefixed with the ethnicity by generate_character.
+            "character_cultural_body": f"{culture.get('customs', 'General customs apply.')} Traditions: {culture.get('traditions', 'General traditions apply.')} Language hints: {culture.get('language', 'Common tongue assumed.')}",
+            "character_physical": f"Environment: {physical_world.get('geography', 'Varied.')} Climate: {physical_world.get('climate', 'Varied.')}",
+            "location_physical": f"General Geography: {physical_world.get('geography', 'Not specified')}\nGeneral Climate: {physical_world.get('climate', 'Not specified')}",
+            "location_cultural": f"Dominant Culture(s): {culture.get('social_structure', 'Not specified')} Governance Style: {culture.get('governance', 'Not specified')}",
+            "historical": f"World History Overview: {physical_world.get('history', 'Not specified')}",
+            "artifact_cultural": f"Relevant Cultures: {culture.get('religions', 'Various beliefs exist.')}",
+        }
+        return self._context_cache
+
+    def _world_context_summary(self) -> str:
+        """Build (and memoize) the world-context summary embedded in entity
+        prompts.
+
+        The 5-9 sibling _create_prompt calls in one generate_* batch all see
+        the same world state, so the rendered string is reused until a
+        generated category (or a world load) changes world_data and clears
+        the memo.
+        """
+        if self._world_ctx_summary is not None:
+            return self._world_ctx_summary
 
-        world_context_summary = f"World Core Concept: {self.world_data.get('core_concept', 'Not specified')}. "
         physical_data = self.world_data.get('physical_world', {})
         culture_data = self.world_data.get('culture', {})
 
+        # Collect the pieces and join once instead of reallocating the
+        # growing string on every +=.
+        parts = [f"World Core Concept: {self.world_data.get('core_concept', 'Not specified')}. "]
         if physical_data:
             geo = physical_data.get('geography', '')
             clim = physical_data.get('climate', '')
             hist = physical_data.get('history', '')
-            world_context_summary += f"Key Geography: {geo[:100]}... Climate: {clim[:100]}... History Snippet: {hist[:100]}..."
+            parts.append(f"Key Geography: {geo[:100]}... Climate: {clim[:100]}... History Snippet: {hist[:100]}...")
         if culture_data:
             soc = culture_data.get('social_structure', '')
             gov = culture_data.get('governance', '')
-            world_context_summary += f" Dominant Culture: {soc[:100]}... Governance: {gov[:100]}..."
+            parts.append(f" Dominant Culture: {soc[:100]}... Governance: {gov[:100]}...")
+        world_context_summary = "".join(parts)
 
         world_context_summary = world_context_summary[:500] + "..." if len(world_context_summary) > 500 else world_context_summary
+        self._world_ctx_summary = world_context_summary
+        return world_context_summary
 
-        base_prompt_templates = {
-            # --- World seed prompts (expect 1 arg: core_concept) ---
-            "geography": "(give 2 word reply)You are a fantasy world-building expert... Based on the core concept '{0}', describe...",
-            "climate": "(give 2 word reply)You are a fantasy world-building expert... For a world based on '{0}', describe its climate patterns...",
-            "flora_fauna": "(give 2 word reply)You are a fantasy world-building expert... Invent unique flora and fauna for a world based on '{0}'...",
-            "resources": "(give 2 word reply)You are a fantasy world-building expert... Describe the key natural resources found in a world based on '{0}'...",
-            "history": "(give 2 word reply)You are a fantasy world-building expert... Create a concise history outline for a world based on '{0}'...",
-
-            # --- Cultural tapestry prompts (expect 3 args: idea, physical_ctx, core_concept) ---
-            "social_structure": "(give 2 word reply)You are a fantasy world-building expert... Detail the social structure of a '{0}' society within the world context '{2}'. Physical Context: {1}. Describe...",
-            "governance": "(give 2 word reply)You are a fantasy world-building expert... Describe the governance... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Explain...",
-            "economy": "(give 2 word reply)You are a fantasy world-building expert... Describe the economy of a '{0}' society within the world context '{2}'. Physical Context: {1}. Explain...",
-            "customs": "(give 2 word reply)You are a fantasy world-building expert... Describe the daily customs... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Include...",
-            "traditions": "(give 2 word reply)You are a fantasy world-building expert... Detail the significant traditions... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Describe...",
-            "religions": "(give 2 word reply)You are a fantasy world-building expert... Describe the primary religious beliefs... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Detail...",
-            "language": "(give 2 word reply)You are a fantasy world-building expert... Create key aspects of the language(s) for a '{0}' society within the world context '{2}'. Physical Context: {1}. Suggest...",
-            "art": "(give 2 word reply)You are a fantasy world-building expert... Describe the prominent artistic expressions of a '{0}' society within the world context '{2}'. Physical Context: {1}. Detail...",
-            "technology": "(give 2 word reply)You are a fantasy world-building expert... Describe the general technology level... of a '{0}' society within the world context '{2}'. Physical Context: {1}. Consider...",
-
-            # --- Faction prompts (expect varying args, check calls carefully) ---
-            # 0=name, 1=type, 2=goal, 3=cultural_ctx, [4=physical_ctx], [5=existing_factions]
-            "faction_description": "(give 2 word reply)You are a fantasy world-building expert. Describe the faction '{0}', a '{1}' group whose main goal is '{2}'. ... Cultural Context: {3}. {world_context_summary}",
-            "faction_organization": "(give 2 word reply)Detail the internal organization... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
-            "faction_leadership": "(give 2 word reply)Describe the leadership... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
-            "faction_values": "(give 2 word reply)Explain the core values... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
-            "faction_activities": "(give 2 word reply)Describe the typical activities... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Cultural Context: {3}. {world_context_summary}",
-            "faction_relationships": "(give 2 word reply)Detail the relationships of the faction '{0}' (a '{1}' aiming for '{2}') with other groups. ... Consider other factions {4}. {world_context_summary}", # Arg index 4 is factions dict
-            "faction_resources": "(give 2 word reply)Describe the resources... for the faction '{0}' (a '{1}' aiming for '{2}'). ... Physical/Resource Context: {4}. {world_context_summary}", # Arg index 4 is physical_ctx
-            "faction_history": "(give 2 word reply)Outline the history... of the faction '{0}' (a '{1}' aiming for '{2}'). ... Historical Context: {4}. {world_context_summary}", # Arg index 4 is physical_ctx
-
-            # --- Character prompts (expect varying args) ---
-            # 0=name, 1=role, 2=ethnicity, 3=context1, [4=context2], [5=context3], ...
-            "character_appearance": "(give 2 word reply)You are a fantasy world-building expert... Describe the physical appearance of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
-            "character_personality": "(give 2 word reply)You are a fantasy world-building expert... Describe the personality of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
-            "character_backstory": "(give 2 word reply)You are a fantasy world-building expert... Create a compelling backstory for '{0}', a '{2}' '{1}'. Consider their {3} and {4}. Quirk Origin/Influence: {5}. {world_context_summary}", # Expects 6 args
-            "character_skills": "(give 2 word reply)You are a fantasy world-building expert... Detail the skills... of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
-            "character_relationships": "(give 2 word reply)You are a fantasy world-building expert... Describe the key relationships of '{0}', a '{2}' '{1}'. Consider their {3} and existing characters like {4}. {world_context_summary}", # Expects 5 args
-            "character_aspirations": "(give 2 word reply)You are a fantasy world-building expert... Detail the aspirations... of '{0}', a '{2}' '{1}'. Consider their {3}. Quirk Influence: {4}. {world_context_summary}", # Expects 5 args
-            "character_possessions": "(give 2 word reply)You are a fantasy world-building expert... Describe the significant possessions... of '{0}', a '{2}' '{1}'. Consider their {3}. {world_context_summary}", # Expects 4 args
-
-            # --- Location prompts (expect varying args) ---
-            # 0=name, 1=type, 2=brief_desc, 3=context
-            "location_description": "(give 2 word reply)You are a fantasy world-building expert... Provide a detailed sensory description of '{0}', a '{1}' described as: '{2}'. Physical Context: {3}. {world_context_summary}", # Expects 4 args
-            "location_history": "(give 2 word reply)Outline the history of '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
-            "location_inhabitants": "(give 2 word reply)Describe the typical inhabitants... of '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
-            "location_poi": "(give 2 word reply)Detail 3-5 specific points of interest within '{0}', a '{1}' ({2}).", # Expects 3 args
-            "location_economy": "(give 2 word reply)Describe the local economy... within '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
-            "location_governance": "(give 2 word reply)Explain the local governance... within '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
-            "location_culture": "(give 2 word reply)Describe the unique local culture... in '{0}', a '{1}' ({2}). Cultural Context: {3}. {world_context_summary}", # Expects 4 args
-            "location_secrets": "(give 2 word reply)Invent some secrets... associated with '{0}', a '{1}' ({2}).", # Expects 3 args
-
-            # --- Artifact prompts (expect varying args) ---
-            # 0=name, 1=type, 2=origin, [3=context]
-            "artifact_description": "(give 2 word reply)You are a fantasy world-building expert. Describe the appearance... of '{0}', a '{1}' artifact supposedly originating from '{2}'. {world_context_summary}", # Expects 3 args
-            "artifact_history": "(give 2 word reply)Detail the known history... surrounding '{0}', a '{1}' from '{2}'. Historical Context: {3}. {world_context_summary}", # Expects 4 args
-            "artifact_powers": "(give 2 word reply)Describe the powers... of '{0}', a '{1}' from '{2}'.", # Expects 3 args
-            "artifact_creation": "(give 2 word reply)Elaborate on the creation of '{0}', a '{1]}' from '{2}'.", # Expects 3 args
-            "artifact_status": "(give 2 word reply)Describe the current status... of '{0}', a '{1}' from '{2}'.", # Expects 3 args
-            "artifact_significance": "(give 2 word reply)Explain the cultural... significance of '{0}', a '{1}' from '{2}'. Cultural Context: {3}. {world_context_summary}", # Expects 4 args
-
-            # --- Event prompts (expect varying args) ---
-            # 0=name, 1=type, 2=timeframe, [3=context], [4=context]
-            "event_description": "(give 2 word reply)You are a fantasy world-building historian. Provide a concise summary description of '{0}', a '{1]}' event that occurred roughly '{2}'. {world_context_summary}", # Expects 3 args
-            "event_causes": "(give 2 word reply)Detail the primary causes... leading up to '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
-            "event_happenings": "(give 2 word reply)Describe the major happenings... during '{0}', a '{1}' ({2}).", # Expects 3 args
-            "event_figures": "I(give 2 word reply)dentify the key figures... involved in '{0}', a '{1}' ({2}). Context: {3}, {4}. {world_context_summary}", # Expects 5 args
-            "event_impact": "(give 2 word reply)Describe the immediate outcome... of '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
-            "event_consequences": "(give 2 word reply)Explain the long-term consequences... of '{0}', a '{1}' ({2}). Historical Context: {3}. {world_context_summary}", # Expects 4 args
-        }
-
-        template = base_prompt_templates.get(prompt_type)
+    def _create_prompt(self, prompt_type: str, *args) -> str:
+        """Create a detailed prompt based on the type and arguments, incorporating world context."""
+        template = _PROMPT_TEMPLATES.get(prompt_type)
 
         if template is None:
             fallback_args = ", ".join(map(str, args))
-            # Replace print with logging or return a specific error value/structure
-            print(f"Warning: Unknown prompt type '{prompt_type}' requested.")
-            return f"Generate detailed information about '{prompt_type.replace('_', ' ')}' concerning '{fallback_args}'. Consider the overall world context: {world_context_summary}"
+            logger.warning("Unknown prompt type %r requested.", prompt_type)
+            return f"Generate detailed information about '{prompt_type.replace('_', ' ')}' concerning '{fallback_args}'. Consider the overall world context: {self._world_context_summary()}"
+
+        # Only templates that actually embed the summary pay for building it.
+        if prompt_type in _CONTEXT_TEMPLATES:
+            world_context_summary = self._world_context_summary()
+        else:
+            world_context_summary = ""
 
         try:
-            return template.format(*args)
+            prompt = template.format(*args, world_context_summary=world_context_summary)
+            # Record template/bindings so the structural cache can adapt a
+            # previous response for this template to the new argument values.
+            # The summary participates as a binding so a changed world context
+            # invalidates adaptation instead of silently reusing stale text.
+            bindings = args + (world_context_summary,) if world_context_summary else args
+            self._remember_bindings(prompt, prompt_type, bindings)
+            return prompt
         except IndexError:
-            # Replace print with logging or return a specific error value/structure
             num_expected = template.count('{') # Simple approximation
             num_provided = len(args)
             fallback_args = ", ".join(map(str, args))
-            print(f"Warning: Prompt '{prompt_type}' called with incorrect number of arguments (provided {num_provided}, template might expect approx {num_expected}). Args: {args}. Using fallback.")
-            return f"Error creating prompt '{prompt_type}': Mismatched arguments. Base info: '{fallback_args}'. World context: {world_context_summary}"
+            logger.warning("Prompt %r called with incorrect number of arguments (provided %d, template might expect approx %d). Args: %s. Using fallback.", prompt_type, num_provided, num_expected, args)
+            return f"Error creating prompt '{prompt_type}': Mismatched arguments. Base info: '{fallback_args}'. World context: {self._world_context_summary()}"
         except Exception as e:
-            # Replace print with logging or return a specific error value/structure
             fallback_args = ", ".join(map(str, args))
-            print(f"Error formatting prompt '{prompt_type}' with args {args}: {e}")
-            return f"Error formatting prompt '{prompt_type}'. Base info: '{fallback_args}'. World context: {world_context_summary}"
\ No newline at end of file
+            logger.error("Error formatting prompt %r with args %s: %s", prompt_type, args, e)
+            return f"Error formatting prompt '{prompt_type}'. Base info: '{fallback_args}'. World context: {self._world_context_summary()}"
\ No newline at end of file
@@ -1,8 +1,15 @@
 # backend/main.py
 
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
+# Import the auth middleware
+from .core import security
+from .core import llm_providers
 # Import the auth router (keep existing)
 from .api import auth
 # Import the new routers
@@ -11,7 +18,22 @@ from .api import generation
 
 
 # Initialize the FastAPI application
-app = FastAPI()
+# ORJSONResponse serializes responses with orjson (already a dependency),
+# which is several times faster than the stdlib json encoder and emits bytes
+# directly - this applies to every route, including the nested generation
+# responses where encoding cost is most visible.
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Warm the provider SDK import caches off the request path - cold-importing
+# an SDK (google.generativeai is the worst offender) would otherwise add
+# hundreds of ms to the first init-llm request. SDKs that aren't installed
+# are simply skipped.
+threading.Thread(target=llm_providers.preload_provider_sdks, daemon=True).start()
+
+# Warm the auth path: a throwaway token encode/validate initializes the JWT
+# algorithm backend before the first real login (bcrypt warms itself at
+# import time via the timing dummy). Cheap enough to run inline.
+security.warmup()
 
 # --- CORS Configuration ---
 # Make sure the frontend origin is correctly listed here
@@ -21,12 +43,24 @@ origins = [
     # Add other origins if needed (e.g., production domain)
 ]
 
+# Authenticate the bearer token once per request and stash the user on
+# request.state so the get_current_user dependency is a cheap state read.
+app.add_middleware(security.AuthMiddleware)
+
+# Generated world payloads are large, highly redundant text that gzips
+# 5-10x; responses under 1 KB skip compression entirely. Level 5 is the
+# usual latency/ratio sweet spot.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists instead of "*": the API only serves these, and with
+    # allow_credentials a wildcard just makes Starlette echo the request's
+    # Access-Control-Request-* headers back on every preflight.
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 # --- End CORS Configuration ---
 
@@ -49,4 +83,13 @@ app.include_router(generation.router, prefix="/api/generation", tags=["generatio
 # from .api import simulation, chat, world # Example imports
 # app.include_router(simulation.router, prefix="/api/simulation", tags=["simulation"])
 # app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
-# app.include_router(world.router, prefix="/api/world", tags=["world"])
\ No newline at end of file
+# app.include_router(world.router, prefix="/api/world", tags=["world"])
+
+
+# Run with `python -m backend.main` (from the worldforge/ directory) or:
+#   uvicorn backend.main:app --loop uvloop --http httptools --workers $(nproc)
+# uvloop + httptools replace the stdlib event loop and h11 parser and speed up
+# every async handler; both are pinned in backend/requirements.txt.
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -36,6 +36,7 @@ class LLMSettings(BaseModel):
     provider_key: str = Field(..., description="Key identifying the chosen LLM provider (e.g., 'Google Gemini', 'OpenAI')")
     api_key: Optional[str] = Field(None, description="The API key for the selected provider.")
     hf_model_id: Optional[str] = Field(None, description="Required if provider_key is 'Hugging Face'.")
+    cache_responses: bool = Field(True, description="Cache identical prompts and reuse the response. Disable for non-deterministic (high-temperature) generation styles.")
 
 # --- New Schemas for World Data & Generation ---
 # Schema for the physical world section (from generate_world_seed)
@@ -67,6 +68,34 @@ class CultureGenerateRequest(BaseModel):
         """Schema for Cultural Tapestry generation request."""
         societal_structure: str
         
+class InteractionSimulateRequest(BaseModel):
+        """Schema for an interaction simulation request."""
+        entity1_name: str
+        entity2_name: str
+        interaction_type: str
+        setting_context: str = Field(default="")
+
+class WorldData(BaseModel):
+        """Schema for a saved world file (WorldBuilder.load_world).
+
+        Validates the top-level shape in one pydantic-core pass at load time,
+        so downstream code can trust the section types instead of re-checking
+        them on every access. Sections stay loosely typed dicts because their
+        contents are free-form LLM output."""
+        core_concept: str = Field(default="")
+        societal_structure_idea: str = Field(default="")
+        physical_world: Dict[str, Any] = Field(default_factory=dict)
+        culture: Dict[str, Any] = Field(default_factory=dict)
+        factions: Dict[str, Any] = Field(default_factory=dict)
+        characters: Dict[str, Any] = Field(default_factory=dict)
+        locations: Dict[str, Any] = Field(default_factory=dict)
+        artifacts: Dict[str, Any] = Field(default_factory=dict)
+        events: Dict[str, Any] = Field(default_factory=dict)
+        interactions: List[Dict[str, Any]] = Field(default_factory=list)
+        # Hand-edited world files may carry extra keys; keep them.
+        class Config:
+            extra = "allow"
+
 class CultureData(BaseModel):
         """Schema for Cultural Tapestry response data."""
         # Define expected fields based on your world_builder output for culture